@@ -103,8 +103,7 @@ class PlaceAmenities(Resource):
             if not a:
                 return {'error': 'Invalid input data'}, 400
         
-        for amenity in amenities_data:
-            place.add_amenity(amenity)
+        facade.add_place_amenities(place_id, amenities_data)
         return {'message': 'Amenities added successfully'}, 200
 
 @api.route('/<place_id>/reviews/')
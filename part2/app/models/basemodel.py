@@ -3,6 +3,7 @@ from datetime import datetime
 
 class BaseModel:
     def __init__(self):
+        self._watchers = []
         self.id = str(uuid.uuid4())
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
@@ -18,6 +19,18 @@ class BaseModel:
                 setattr(self, key, value)
         self.save()  # Update the updated_at timestamp
         
+    def watch(self, callback):
+        """Call callback(obj, attribute) after a watched attribute changes"""
+        self._watchers.append(callback)
+
+    def unwatch(self, callback):
+        self._watchers.remove(callback)
+
+    def changed(self, name):
+        """Tell the watchers that the attribute `name` was set"""
+        for callback in self._watchers:
+            callback(self, name)
+
     def is_max_length(self, name, value, max_length):
         if len(value) > max_length:
             raise ValueError(f"{name} must be {max_length} characters max.") 
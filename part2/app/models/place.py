@@ -48,6 +48,7 @@ class Place(BaseModel):
             raise TypeError("Latitude must be a float")
         super().is_between("latitude", value, -90, 90)
         self.__latitude = value
+        self.changed('latitude')
     
     @property
     def longitude(self):
@@ -59,6 +60,7 @@ class Place(BaseModel):
             raise TypeError("Longitude must be a float")
         super().is_between("longitude", value, -180, 180)
         self.__longitude = value
+        self.changed('longitude')
 
     @property
     def owner(self):
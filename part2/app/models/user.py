@@ -1,10 +1,13 @@
 from .basemodel import BaseModel
 import re
+import threading
 
 from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(BaseModel):
     emails = set()
+    # Makes the check and the update of emails atomic across request threads
+    emails_lock = threading.Lock()
 
     def __init__(self, first_name, last_name, email, password, is_admin=False):
         super().__init__()
@@ -52,12 +55,13 @@ class User(BaseModel):
             raise TypeError("Email must be a string")
         if not re.match(r"[^@]+@[^@]+\.[^@]+", value):
             raise ValueError("Invalid email format")
-        if value in User.emails:
-            raise ValueError("Email already exists")
-        if hasattr(self, "_User__email"):
-            User.emails.discard(self.__email)
-        self.__email = value
-        User.emails.add(value)
+        with User.emails_lock:
+            if value in User.emails:
+                raise ValueError("Email already exists")
+            if hasattr(self, "_User__email"):
+                User.emails.discard(self.__email)
+            self.__email = value
+            User.emails.add(value)
 
     @property
     def is_admin(self):
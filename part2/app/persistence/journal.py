@@ -0,0 +1,368 @@
+"""Durability for the in-memory repositories: operation log and snapshots.
+
+Every add, update and delete made through an attached repository is
+appended to the current log segment as one JSON line. A background
+thread writes the appended lines and fsyncs them in groups: writers that
+wait for durability (sync=True) share one fsync, whatever their number.
+
+snapshot() holds off the writes of every repository only long enough
+to start a new log segment and take a shallow copy of every object, then
+encodes and writes the copies to a snapshot file outside of the locks:
+reads and writes go on meanwhile. It runs in the background every `snapshot_every`
+operations and removes the files the new snapshot makes useless.
+recover() loads the latest snapshot and replays the segments that
+follow it.
+
+Only changes made through the repositories are logged: an object changed
+directly through its setters is not durable until its next update().
+"""
+import gc
+import json
+import os
+import re
+import threading
+from contextlib import ExitStack
+from datetime import datetime
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+
+# Attributes stored in the records of each model, references to other
+# models excepted: those are stored as '<attribute>_id'
+_FIELDS = {
+    User: ('first_name', 'last_name', 'email', 'password', 'is_admin'),
+    Amenity: ('name',),
+    Place: ('title', 'description', 'price', 'latitude', 'longitude', 'amenities'),
+    Review: ('text', 'rating'),
+}
+_REFERENCES = {
+    Place: {'owner': User},
+    Review: {'place': Place, 'user': User},
+}
+# Lists filled by the facade when it links the objects together
+_LISTS = {
+    User: ('places', 'reviews'),
+    Place: ('reviews',),
+}
+
+_FILE_NAME = re.compile(r'^(log|snapshot)-(\d+)\.jsonl$')
+_ROTATE = object()
+
+
+def encode(obj):
+    model = type(obj)
+    record = {
+        'id': obj.id,
+        'created_at': obj.created_at.isoformat(),
+        'updated_at': obj.updated_at.isoformat(),
+    }
+    for field in _FIELDS[model]:
+        record[field] = getattr(obj, field)
+    for attr in _REFERENCES.get(model, ()):
+        record[f'{attr}_id'] = getattr(obj, attr).id
+    return record
+
+
+def _copy(obj):
+    """A shallow copy of obj for encode(), which later writes to obj do not change"""
+    model = type(obj)
+    clone = model.__new__(model)
+    state = clone.__dict__
+    state.update(obj.__dict__)
+    for field in _FIELDS[model]:
+        if type(state.get(field)) is list:
+            state[field] = list(state[field])
+    return clone
+
+
+def decode(model, record, resolve):
+    """Rebuild an object from its record without running __init__ (the password
+    is already hashed); resolve(model, id) returns the objects it references"""
+    obj = model.__new__(model)
+    # What BaseModel.__init__ sets, without drawing a uuid to overwrite it
+    obj._watchers = []
+    obj.id = record['id']
+    obj.created_at = datetime.fromisoformat(record['created_at'])
+    obj.updated_at = datetime.fromisoformat(record['updated_at'])
+    for field in _FIELDS[model]:
+        setattr(obj, field, record[field])
+    for attr, target in _REFERENCES.get(model, {}).items():
+        setattr(obj, attr, resolve(target, record[f'{attr}_id']))
+    for attr in _LISTS.get(model, ()):
+        setattr(obj, attr, [])
+    return obj
+
+
+class Journal:
+    def __init__(self, directory, sync=True, snapshot_every=100000):
+        """Log the writes to the files of `directory`.
+
+        With sync, writes return once their log line is on disk; without
+        it, they return at once and the last lines may be lost on a crash.
+        """
+        self.directory = directory
+        self.sync = sync
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        # name -> (repository, model), in the order of the snapshots
+        self._repositories = {}
+        self._condition = threading.Condition()
+        self._buffer = []
+        self._appended = 0
+        self._durable = 0
+        self._since_snapshot = 0
+        self._segment = None
+        self._file = None
+        self._error = None
+        self._closed = False
+        self._recovering = False
+        self._flusher = None
+        self._snapshotter = None
+        self._local = threading.local()
+
+    def attach(self, name, repository, model):
+        """Log the writes of `repository`, which stores `model` objects.
+
+        Attach the repositories of referenced models first: recovery loads
+        them in this order. Snapshots taken while writes go on need
+        repositories whose frozen() holds them off, like
+        ThreadSafeInMemoryRepository.
+        """
+        self._repositories[name] = (repository, model)
+        repository._journal = self
+        repository._journal_name = name
+
+    # Recovery
+
+    def _files(self, kind):
+        numbers = []
+        for file_name in os.listdir(self.directory):
+            match = _FILE_NAME.match(file_name)
+            if match and match.group(1) == kind:
+                numbers.append(int(match.group(2)))
+        return sorted(numbers)
+
+    def _path(self, kind, number):
+        return os.path.join(self.directory, f'{kind}-{number:08d}.jsonl')
+
+    def recover(self):
+        """Load the latest snapshot then replay the log segments written after it;
+        returns the number of objects loaded and of operations replayed"""
+        repositories = {model: repository for repository, model in self._repositories.values()}
+
+        def resolve(model, obj_id):
+            obj = repositories[model].get(obj_id)
+            if obj is None:
+                raise ValueError(f"{model.__name__} {obj_id} not found")
+            return obj
+
+        snapshots = self._files('snapshot')
+        first_segment = snapshots[-1] if snapshots else 0
+        loaded = replayed = 0
+        self._recovering = True
+        # Every object created from here on survives: collecting would only go over them again and again
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if snapshots:
+                loaded = self._load(self._path('snapshot', snapshots[-1]), resolve)
+            segments = [number for number in self._files('log') if number >= first_segment]
+            for number in segments:
+                replayed += self._replay(self._path('log', number), resolve, last=number == segments[-1])
+            self._segment = segments[-1] if segments else first_segment
+        finally:
+            self._recovering = False
+            if gc_enabled:
+                gc.enable()
+        return loaded, replayed
+
+    def _load(self, path, resolve):
+        # The records of each repository follow each other: load them together
+        count = 0
+        current, objs = None, []
+        with open(path) as f:
+            for line in f:
+                name, record = json.loads(line)
+                if name != current:
+                    if current is not None:
+                        self._repositories[current][0].load(objs)
+                    current, objs = name, []
+                objs.append(decode(self._repositories[name][1], record, resolve))
+                count += 1
+        if current is not None:
+            self._repositories[current][0].load(objs)
+        return count
+
+    def _replay(self, path, resolve, last):
+        count = 0
+        end = 0
+        with open(path, 'rb+') as f:
+            for line in f:
+                try:
+                    name, op, payload = json.loads(line)
+                except ValueError:
+                    if not last:
+                        raise
+                    # A crash left the last line half written: it was never acknowledged
+                    f.truncate(end)
+                    break
+                end += len(line)
+                repository, model = self._repositories[name]
+                if op == 'add':
+                    repository.add(decode(model, payload, resolve))
+                elif op == 'update':
+                    repository.update(payload['id'], payload['data'])
+                    repository.get(payload['id']).updated_at = datetime.fromisoformat(payload['updated_at'])
+                elif op == 'delete':
+                    repository.delete(payload['id'])
+                count += 1
+        return count
+
+    # Logging
+
+    def start(self):
+        """Open a new log segment and start writing to it in the background"""
+        self._segment = (self._segment or 0) + 1
+        self._file = self._open_segment(self._segment)
+        self._flusher = threading.Thread(target=self._flush_loop, name='journal-flusher', daemon=True)
+        self._flusher.start()
+
+    def _open_segment(self, number):
+        f = open(self._path('log', number), 'a')
+        self._sync_directory()
+        return f
+
+    def _sync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def added(self, name, obj):
+        if not self._recovering:
+            self._append(name, 'add', encode(obj))
+
+    def updated(self, name, obj, data):
+        if not self._recovering:
+            data = {key: value for key, value in data.items() if hasattr(obj, key)}
+            self._append(name, 'update', {'id': obj.id, 'data': data, 'updated_at': obj.updated_at.isoformat()})
+
+    def deleted(self, name, obj_id):
+        if not self._recovering:
+            self._append(name, 'delete', {'id': obj_id})
+
+    def _append(self, name, op, payload):
+        line = json.dumps([name, op, payload], separators=(',', ':'))
+        with self._condition:
+            if self._file is None:
+                raise RuntimeError("Journal not started")
+            self._buffer.append(line)
+            self._appended += 1
+            self._since_snapshot += 1
+            self._local.position = self._appended
+            self._condition.notify_all()
+
+    def wait(self):
+        """Wait until the lines this thread appended are on disk (with sync)"""
+        if not self.sync:
+            return
+        position = getattr(self._local, 'position', 0)
+        with self._condition:
+            while self._durable < position:
+                if self._error is not None:
+                    raise OSError("Journal write failed") from self._error
+                self._condition.wait()
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while not self._buffer and not self._closed:
+                    self._condition.wait()
+                if not self._buffer:
+                    return
+                lines, self._buffer = self._buffer, []
+                position = self._appended
+            try:
+                self._write(lines)
+            except OSError as e:
+                with self._condition:
+                    self._error = e
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._durable = position
+                self._condition.notify_all()
+                snapshot_due = self.snapshot_every and self._since_snapshot >= self.snapshot_every
+                if snapshot_due and not self._closed and (self._snapshotter is None or not self._snapshotter.is_alive()):
+                    self._snapshotter = threading.Thread(target=self.snapshot, name='journal-snapshot', daemon=True)
+                    self._snapshotter.start()
+
+    def _write(self, lines):
+        # One write and one fsync per segment for the whole group
+        chunk = []
+        for line in lines:
+            if isinstance(line, tuple) and line[0] is _ROTATE:
+                self._commit(chunk)
+                self._file.close()
+                self._file = self._open_segment(line[1])
+                chunk = []
+            else:
+                chunk.append(line)
+        self._commit(chunk)
+
+    def _commit(self, chunk):
+        if chunk:
+            self._file.write('\n'.join(chunk) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    # Snapshots
+
+    def snapshot(self):
+        """Write every object to a snapshot file and delete the files it replaces;
+        returns the snapshot number.
+
+        Repositories are only held off while their objects are copied;
+        encoding and writing the copies happen outside of their locks. Do
+        not call it from a thread holding the lock of an attached repository.
+        """
+        with ExitStack() as stack:
+            copies = [(name, [_copy(obj) for obj in stack.enter_context(repository.frozen())])
+                      for name, (repository, model) in self._repositories.items()]
+            # No write can run now: every line logged so far is in the snapshot
+            with self._condition:
+                self._segment += 1
+                number = self._segment
+                self._buffer.append((_ROTATE, number))
+                self._since_snapshot = 0
+                self._condition.notify_all()
+        path = self._path('snapshot', number)
+        with open(f'{path}.tmp', 'w') as f:
+            for name, objs in copies:
+                for obj in objs:
+                    f.write(json.dumps([name, encode(obj)], separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f'{path}.tmp', path)
+        self._sync_directory()
+        for kind in ('snapshot', 'log'):
+            for old in self._files(kind):
+                if old < number:
+                    os.remove(self._path(kind, old))
+        return number
+
+    def close(self):
+        """Write what is left of the log and stop the background threads"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
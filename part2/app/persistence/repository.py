@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from functools import wraps
+from operator import attrgetter, itemgetter
+from app.persistence.rwlock import default_lock
 
 class Repository(ABC):
     @abstractmethod
@@ -27,11 +32,67 @@ class Repository(ABC):
 
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    """Objects stored by id, with optional hash indexes on other attributes.
+
+    `unique` and `indexes` name the attributes to index, dotted paths
+    included (e.g. 'owner.id'). A unique index refuses a second object
+    with the same value; a non-unique one keeps every match in insertion
+    order. `ordered` attributes get a sorted index of (value, id) pairs,
+    searched by bisection for range() and iter_ordered(); objects whose
+    value is None are left out of it. All of them are kept up to date by
+    add, update and delete; changes made to a stored object outside of
+    update() are not seen by them.
+
+    `grid` is an optional spatial.GridIndex over latitude/longitude, for
+    in_bbox() and nearest(). It watches the stored objects, so it also
+    follows coordinates changed directly through the model setters.
+
+    Once attached to a journal.Journal, every add, update and delete is
+    written to its log before returning (see Journal.attach).
+    """
+    def __init__(self, unique=(), indexes=(), ordered=(), grid=None):
         self._storage = {}
+        self._unique = {attr: {} for attr in unique}
+        self._indexes = {attr: {} for attr in indexes}
+        self._ordered = {attr: [] for attr in ordered}
+        self._getters = {attr: attrgetter(attr) for attr in (*unique, *indexes, *ordered)}
+        # Keys each stored object is indexed under, by id
+        self._keys = {}
+        self._grid = grid
+        self._journal = None
+        self._journal_name = None
 
     def add(self, obj):
-        self._storage[obj.id] = obj
+        self._add(obj)
+        if self._journal is not None:
+            self._journal.added(self._journal_name, obj)
+            self._sync()
+
+    def load(self, objs):
+        """Add objects with new ids in bulk: the sorted indexes are sorted once
+        at the end instead of taking each object in turn"""
+        objs = list(objs)
+        ids = set(self._storage)
+        for obj in objs:
+            if obj.id in ids:
+                raise ValueError(f"Duplicate id {obj.id}")
+            ids.add(obj.id)
+        ordered, self._ordered = self._ordered, {}
+        added = []
+        try:
+            for obj in objs:
+                self._add(obj)
+                added.append(obj)
+                if self._journal is not None:
+                    self._journal.added(self._journal_name, obj)
+        finally:
+            self._ordered = ordered
+            for attr, entries in ordered.items():
+                entries.extend((self._keys[obj.id][attr], obj.id) for obj in added
+                               if self._keys[obj.id][attr] is not None)
+                entries.sort()
+        if self._journal is not None:
+            self._sync()
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
@@ -40,13 +101,204 @@ class InMemoryRepository(Repository):
         return list(self._storage.values())
 
     def update(self, obj_id, data):
-        obj = self.get(obj_id)
+        obj = self._storage.get(obj_id)
         if obj:
-            obj.update(data)
+            self._check_unique(obj, {attr: data[attr] for attr in self._unique if attr in data})
+            self._unindex(obj)
+            try:
+                obj.update(data)
+            finally:
+                self._index(obj)
+            if self._journal is not None:
+                self._journal.updated(self._journal_name, obj, data)
+                self._sync()
 
     def delete(self, obj_id):
         if obj_id in self._storage:
-            del self._storage[obj_id]
+            self._unindex(self._storage.pop(obj_id))
+            if self._journal is not None:
+                self._journal.deleted(self._journal_name, obj_id)
+                self._sync()
+
+    @contextmanager
+    def frozen(self):
+        """Hold off writes while the block runs; yields the stored objects"""
+        yield list(self._storage.values())
+
+    def _sync(self):
+        """Wait until the journal has made the last write durable"""
+        self._journal.wait()
 
     def get_by_attribute(self, attr_name, attr_value):
-        return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
+        if attr_name == 'id':
+            return self._storage.get(attr_value)
+        if attr_name in self._unique:
+            return self._unique[attr_name].get(attr_value)
+        if attr_name in self._indexes:
+            return next(iter(self._indexes[attr_name].get(attr_value, {}).values()), None)
+        getter = attrgetter(attr_name)
+        return next((obj for obj in self._storage.values() if getter(obj) == attr_value), None)
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        """Every object whose attribute equals attr_value, oldest first"""
+        if attr_name in self._indexes:
+            return list(self._indexes[attr_name].get(attr_value, {}).values())
+        if attr_name in self._unique or attr_name == 'id':
+            index = self._unique.get(attr_name, self._storage)
+            return [index[attr_value]] if attr_value in index else []
+        getter = attrgetter(attr_name)
+        return [obj for obj in self._storage.values() if getter(obj) == attr_value]
+
+    def range(self, attr_name, lo=None, hi=None, limit=None, after=None, reverse=False):
+        """Objects whose ordered attribute is between lo and hi (both included),
+        sorted by it then by id, descending if reverse.
+
+        `after` is the cursor returned with the previous page. Returns the
+        objects and the cursor of the next page, None on the last one.
+        """
+        entries = self._ordered[attr_name]
+        start = 0 if lo is None else bisect_left(entries, lo, key=itemgetter(0))
+        end = len(entries) if hi is None else bisect_right(entries, hi, key=itemgetter(0))
+        if after is not None:
+            after = tuple(after)
+            if reverse:
+                end = min(end, bisect_left(entries, after))
+            else:
+                start = max(start, bisect_right(entries, after))
+        if start >= end:
+            return [], None
+        count = end - start if limit is None else min(limit, end - start)
+        if reverse:
+            page = entries[end - count:end][::-1]
+        else:
+            page = entries[start:start + count]
+        next_after = page[-1] if count < end - start else None
+        return [self._storage[obj_id] for _, obj_id in page], next_after
+
+    def iter_ordered(self, attr_name, reverse=False):
+        """Iterate over the objects in the order of an ordered attribute"""
+        entries = self._ordered[attr_name]
+        for _, obj_id in (reversed(entries) if reverse else entries):
+            yield self._storage[obj_id]
+
+    def in_bbox(self, min_lat, max_lat, min_lon, max_lon):
+        """Objects inside the box; min_lon > max_lon means it crosses the antimeridian"""
+        return self._grid.bbox(min_lat, max_lat, min_lon, max_lon)
+
+    def nearest(self, lat, lon, k, radius_km=None):
+        """The k objects closest to (lat, lon) as (distance_km, obj) pairs"""
+        return self._grid.nearest(lat, lon, k, radius_km)
+
+    def _moved(self, obj, name):
+        if name in ('latitude', 'longitude'):
+            self._grid.insert(obj)
+
+    def _add(self, obj):
+        self._check_unique(obj, {attr: self._getters[attr](obj) for attr in self._unique})
+        if obj.id in self._storage:
+            self._unindex(self._storage[obj.id])
+        self._storage[obj.id] = obj
+        self._index(obj)
+
+    def _check_unique(self, obj, values):
+        for attr, value in values.items():
+            holder = self._unique[attr].get(value)
+            if holder is not None and holder.id != obj.id:
+                raise ValueError(f"{attr} already exists")
+
+    def _index(self, obj):
+        keys = self._keys[obj.id] = {attr: getter(obj) for attr, getter in self._getters.items()}
+        for attr, index in self._unique.items():
+            index[keys[attr]] = obj
+        for attr, index in self._indexes.items():
+            index.setdefault(keys[attr], {})[obj.id] = obj
+        for attr, entries in self._ordered.items():
+            if keys[attr] is not None:
+                insort(entries, (keys[attr], obj.id))
+        if self._grid is not None:
+            self._grid.insert(obj)
+            obj.watch(self._moved)
+
+    def _unindex(self, obj):
+        # Use the keys the object was indexed under, whatever its attributes are now
+        keys = self._keys.pop(obj.id, None)
+        if keys is None:
+            return
+        if self._grid is not None:
+            self._grid.remove(obj)
+            obj.unwatch(self._moved)
+        for attr, index in self._unique.items():
+            if index.get(keys[attr]) is obj:
+                del index[keys[attr]]
+        for attr, index in self._indexes.items():
+            bucket = index[keys[attr]]
+            del bucket[obj.id]
+            if not bucket:
+                del index[keys[attr]]
+        for attr, entries in self._ordered.items():
+            if keys[attr] is not None:
+                del entries[bisect_left(entries, (keys[attr], obj.id))]
+
+
+def _reading(method):
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _writing(method):
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock.write():
+            result = method(self, *args, **kwargs)
+        # Outside of the lock, so that concurrent writers share one fsync
+        if self._journal is not None:
+            self._journal.wait()
+        return result
+    return locked
+
+
+class ThreadSafeInMemoryRepository(InMemoryRepository):
+    """InMemoryRepository that can be shared by request threads.
+
+    A write holds the lock alone, so the storage and all of its indexes
+    change together and no reader sees them half updated. With an RWLock
+    (the default on free-threaded Python) reads run concurrently; see
+    rwlock.default_lock(). Methods of InMemoryRepository must not call
+    each other's public versions: the lock is not reentrant.
+    """
+    def __init__(self, *args, lock=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = lock if lock is not None else default_lock()
+
+    add = _writing(InMemoryRepository.add)
+    load = _writing(InMemoryRepository.load)
+    update = _writing(InMemoryRepository.update)
+    delete = _writing(InMemoryRepository.delete)
+    # Setters called outside of update() move the object in the grid
+    _moved = _writing(InMemoryRepository._moved)
+
+    get = _reading(InMemoryRepository.get)
+    get_all = _reading(InMemoryRepository.get_all)
+    get_by_attribute = _reading(InMemoryRepository.get_by_attribute)
+    get_all_by_attribute = _reading(InMemoryRepository.get_all_by_attribute)
+    range = _reading(InMemoryRepository.range)
+    in_bbox = _reading(InMemoryRepository.in_bbox)
+    nearest = _reading(InMemoryRepository.nearest)
+
+    @contextmanager
+    def frozen(self):
+        with self._lock.read():
+            yield list(self._storage.values())
+
+    def _sync(self):
+        # Done by _writing once the lock is released
+        pass
+
+    def iter_ordered(self, attr_name, reverse=False):
+        # Snapshot under the lock rather than holding it between two next() calls
+        with self._lock.read():
+            objs = list(super().iter_ordered(attr_name, reverse))
+        return iter(objs)
@@ -0,0 +1,90 @@
+"""Locks for the in-memory repository.
+
+Both give the same interface: `with lock.read():` and `with lock.write():`.
+"""
+import sys
+import threading
+
+
+class RWLock:
+    """Any number of readers or a single writer.
+
+    A waiting writer stops new readers from entering, so a steady flow
+    of reads cannot starve writes. The lock is not reentrant: a thread
+    holding it must not acquire it again, in either mode.
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+        # Reused by every with block, cheaper than a @contextmanager generator
+        self._reader = _Holder(self.acquire_read, self.release_read)
+        self._writer = _Holder(self.acquire_write, self.release_write)
+
+    def acquire_read(self):
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._condition:
+            self._readers -= 1
+            if not self._readers and self._waiting_writers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+
+    def release_write(self):
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    def read(self):
+        """Context manager holding the lock as a reader"""
+        return self._reader
+
+    def write(self):
+        """Context manager holding the lock as the writer"""
+        return self._writer
+
+
+class _Holder:
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+
+    def __exit__(self, *exc_info):
+        self._release()
+
+
+class Mutex:
+    """One thread at a time, readers included.
+
+    Under the GIL readers cannot run in parallel anyway, and a C lock
+    costs less per call than the Python bookkeeping of RWLock.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def read(self):
+        return self._lock
+
+    write = read
+
+
+def default_lock():
+    """RWLock where threads run in parallel (free-threaded builds), else Mutex"""
+    if getattr(sys, '_is_gil_enabled', lambda: True)():
+        return Mutex()
+    return RWLock()
@@ -0,0 +1,156 @@
+"""Uniform latitude/longitude grid over objects with coordinates.
+
+Each object sits in the cell of `cell_size` degrees containing its
+latitude and longitude. Bounding-box queries only read the cells
+overlapping the box, and nearest() reads rings of cells around the point
+until no unread cell can hold anything closer.
+"""
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    def __init__(self, cell_size=0.5):
+        self.cell_size = cell_size
+        self._rows = math.ceil(180 / cell_size)
+        self._cols = math.ceil(360 / cell_size)
+        # (row, col) -> {id: obj}, only for cells holding something
+        self._cells = {}
+        self._cell_of = {}
+
+    def __len__(self):
+        return len(self._cell_of)
+
+    def _row(self, lat):
+        return min(int((lat + 90) // self.cell_size), self._rows - 1)
+
+    def _col(self, lon):
+        return int((lon + 180) // self.cell_size) % self._cols
+
+    def insert(self, obj):
+        """Put obj in the cell of its coordinates, moving it if it is already indexed"""
+        cell = (self._row(obj.latitude), self._col(obj.longitude))
+        old = self._cell_of.get(obj.id)
+        if old == cell:
+            return
+        if old is not None:
+            self._discard(obj.id, old)
+        self._cells.setdefault(cell, {})[obj.id] = obj
+        self._cell_of[obj.id] = cell
+
+    def remove(self, obj):
+        cell = self._cell_of.pop(obj.id, None)
+        if cell is not None:
+            self._discard(obj.id, cell)
+
+    def _discard(self, obj_id, cell):
+        bucket = self._cells[cell]
+        del bucket[obj_id]
+        if not bucket:
+            del self._cells[cell]
+
+    def bbox(self, min_lat, max_lat, min_lon, max_lon):
+        """Objects inside the box; min_lon > max_lon means it crosses the antimeridian"""
+        cols = self._col_span(min_lon, max_lon)
+        found = []
+        for row in range(self._row(min_lat), self._row(max_lat) + 1):
+            for col in cols:
+                for obj in self._cells.get((row, col), {}).values():
+                    if min_lat <= obj.latitude <= max_lat and self._lon_inside(obj.longitude, min_lon, max_lon):
+                        found.append(obj)
+        return found
+
+    def _col_span(self, min_lon, max_lon):
+        first, last = self._col(min_lon), self._col(max_lon)
+        if min_lon <= max_lon and first <= last:
+            return range(first, last + 1)
+        return [*range(first, self._cols), *range(0, last + 1)]
+
+    @staticmethod
+    def _lon_inside(lon, min_lon, max_lon):
+        if min_lon <= max_lon:
+            return min_lon <= lon <= max_lon
+        return lon >= min_lon or lon <= max_lon
+
+    def nearest(self, lat, lon, k, radius_km=None):
+        """The k objects closest to (lat, lon), within radius_km if given,
+        as (distance_km, obj) pairs sorted by distance"""
+        if k <= 0:
+            return []
+        lon = (lon + 180) % 360 - 180
+        row, col = self._row(lat), self._col(lon)
+        best = []  # max-heap of (-distance, id, obj) holding the k closest so far
+        visited = set()
+        limit = math.inf if radius_km is None else radius_km
+
+        def consider(cell):
+            visited.add(cell)
+            for obj in self._cells.get(cell, {}).values():
+                distance = haversine_km(lat, lon, obj.latitude, obj.longitude)
+                if distance > limit:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, obj.id, obj))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, obj.id, obj))
+
+        ring = 0
+        while True:
+            cells = self._ring(row, col, ring)
+            if len(cells) > len(self._cells):
+                # Fewer occupied cells left than cells in the ring: read them all
+                for cell in list(self._cells):
+                    if cell not in visited:
+                        consider(cell)
+                break
+            for cell in cells:
+                if cell not in visited:
+                    consider(cell)
+            bound = self._unvisited_distance(lat, lon, row, col, ring)
+            if bound > limit or (len(best) == k and bound >= -best[0][0]):
+                break
+            if ring >= max(self._rows, self._cols):
+                break
+            ring += 1
+        return [(-distance, obj) for distance, _, obj in sorted(best, reverse=True)]
+
+    def _ring(self, row, col, ring):
+        """Cells at Chebyshev distance `ring` from (row, col), columns wrapped"""
+        if ring == 0:
+            return [(row, col)]
+        cells = []
+        for r in range(row - ring, row + ring + 1):
+            if not 0 <= r < self._rows:
+                continue
+            if r in (row - ring, row + ring):
+                cols = range(col - ring, col + ring + 1)
+            else:
+                cols = (col - ring, col + ring)
+            cells.extend((r, c % self._cols) for c in cols)
+        return cells
+
+    def _unvisited_distance(self, lat, lon, row, col, ring):
+        """Lower bound of the distance from (lat, lon) to any cell outside the
+        square of rings 0..ring around (row, col)"""
+        south = (row - ring) * self.cell_size - 90
+        north = (row + ring + 1) * self.cell_size - 90
+        bounds = []
+        if south > -90:
+            bounds.append(math.radians(lat - south) * EARTH_RADIUS_KM)
+        if north < 90:
+            bounds.append(math.radians(north - lat) * EARTH_RADIUS_KM)
+        if 2 * ring + 1 < self._cols:
+            west = (col - ring) * self.cell_size - 180
+            east = (col + ring + 1) * self.cell_size - 180
+            dlon = math.radians(min(lon - west, east - lon, 90))
+            # Shortest distance from the point to the meridian dlon away
+            bounds.append(math.asin(math.sin(dlon) * math.cos(math.radians(lat))) * EARTH_RADIUS_KM)
+        return min(bounds, default=math.inf)
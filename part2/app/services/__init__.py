@@ -1,3 +1,5 @@
+import os
 from .facade import HBnBFacade
 
-facade = HBnBFacade()
+# Set HBNB_DATA_DIR to keep the data across restarts
+facade = HBnBFacade(data_dir=os.getenv('HBNB_DATA_DIR'))
@@ -1,15 +1,39 @@
-from app.persistence.repository import InMemoryRepository
+import atexit
+from app.persistence.journal import Journal
+from app.persistence.repository import ThreadSafeInMemoryRepository
+from app.persistence.spatial import GridIndex
 from app.models.user import User
 from app.models.amenity import Amenity
 from app.models.place import Place
 from app.models.review import Review
 
 class HBnBFacade:
-    def __init__(self):
-        self.user_repo = InMemoryRepository()
-        self.amenity_repo = InMemoryRepository()
-        self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
+    def __init__(self, data_dir=None):
+        """With data_dir, the repositories are logged and snapshotted there, and
+        reloaded from it on start; otherwise they only live in memory"""
+        self.user_repo = ThreadSafeInMemoryRepository(unique=('email',))
+        self.amenity_repo = ThreadSafeInMemoryRepository(indexes=('name',))
+        self.place_repo = ThreadSafeInMemoryRepository(indexes=('owner.id',), ordered=('price', 'created_at'), grid=GridIndex())
+        self.review_repo = ThreadSafeInMemoryRepository()
+        self.journal = None
+        if data_dir:
+            self.journal = Journal(data_dir)
+            self.journal.attach('users', self.user_repo, User)
+            self.journal.attach('amenities', self.amenity_repo, Amenity)
+            self.journal.attach('places', self.place_repo, Place)
+            self.journal.attach('reviews', self.review_repo, Review)
+            self.journal.recover()
+            self._link()
+            self.journal.start()
+            atexit.register(self.journal.close)
+
+    def _link(self):
+        """Fill the lists of places and reviews of the recovered objects"""
+        for place in self.place_repo.get_all():
+            place.owner.add_place(place)
+        for review in self.review_repo.get_all():
+            review.user.add_review(review)
+            review.place.add_review(review)
 
     # USER
     def create_user(self, user_data):
@@ -58,11 +82,11 @@ class HBnBFacade:
                 if not amenity:
                     raise KeyError('Invalid input data')
         place = Place(**place_data)
-        self.place_repo.add(place)
-        user.add_place(place)
         if amenities:
             for amenity in amenities:
                 place.add_amenity(amenity)
+        self.place_repo.add(place)
+        user.add_place(place)
         return place
 
     def get_place(self, place_id):
@@ -71,9 +95,32 @@ class HBnBFacade:
     def get_all_places(self):
         return self.place_repo.get_all()
 
+    def get_places_by_owner(self, owner_id):
+        return self.place_repo.get_all_by_attribute('owner.id', owner_id)
+
+    def get_places_by_price(self, min_price=None, max_price=None, limit=None, after=None):
+        """Places priced between min_price and max_price, cheapest first, and the next cursor"""
+        return self.place_repo.range('price', min_price, max_price, limit, after)
+
+    def get_newest_places(self, limit=None, after=None):
+        """Places newest first, and the next cursor"""
+        return self.place_repo.range('created_at', limit=limit, after=after, reverse=True)
+
+    def get_places_in_bbox(self, min_lat, max_lat, min_lon, max_lon):
+        return self.place_repo.in_bbox(min_lat, max_lat, min_lon, max_lon)
+
+    def get_nearby_places(self, lat, lon, limit=20, radius_km=None):
+        """The closest places to (lat, lon), as (distance_km, place) pairs"""
+        return self.place_repo.nearest(lat, lon, limit, radius_km)
+
     def update_place(self, place_id, place_data):
         self.place_repo.update(place_id, place_data)
 
+    def add_place_amenities(self, place_id, amenities):
+        # Through the repository, so that the change is logged
+        place = self.place_repo.get(place_id)
+        self.place_repo.update(place_id, {'amenities': place.amenities + list(amenities)})
+
     # REVIEWS
     def create_review(self, review_data):
         user = self.user_repo.get(review_data['user_id'])
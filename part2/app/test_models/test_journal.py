@@ -0,0 +1,181 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import uuid
+from unittest import mock
+from app.models.amenity import Amenity
+from app.models.user import User
+from app.persistence import journal as journal_module
+from app.persistence.journal import Journal
+from app.persistence.repository import ThreadSafeInMemoryRepository
+from app.services.facade import HBnBFacade
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def open(self, **kwargs):
+        repo = ThreadSafeInMemoryRepository(unique=('name',))
+        journal = Journal(self.directory, **kwargs)
+        journal.attach('amenities', repo, Amenity)
+        counts = journal.recover()
+        journal.start()
+        self.addCleanup(journal.close)
+        return repo, journal, counts
+
+    def names(self, repo):
+        return sorted(amenity.name for amenity in repo.get_all())
+
+    def test_log_is_replayed(self):
+        repo, journal, counts = self.open()
+        self.assertEqual(counts, (0, 0))
+        wifi, pool, sauna = Amenity("Wi-Fi"), Amenity("Pool"), Amenity("Sauna")
+        for amenity in (wifi, pool, sauna):
+            repo.add(amenity)
+        repo.update(wifi.id, {'name': "Wireless"})
+        repo.delete(pool.id)
+        journal.close()
+
+        recovered, _, counts = self.open()
+        self.assertEqual(counts, (0, 5))
+        self.assertEqual(self.names(recovered), ["Sauna", "Wireless"])
+        restored = recovered.get(wifi.id)
+        self.assertEqual((restored.created_at, restored.updated_at), (wifi.created_at, wifi.updated_at))
+        self.assertIs(recovered.get_by_attribute('name', "Sauna"), recovered.get(sauna.id))
+
+    def test_snapshot_and_log_tail(self):
+        repo, journal, _ = self.open(snapshot_every=None)
+        amenities = [Amenity(f"Amenity {i}") for i in range(10)]
+        for amenity in amenities:
+            repo.add(amenity)
+        journal.snapshot()
+        repo.delete(amenities[0].id)
+        repo.add(Amenity("After snapshot"))
+        journal.close()
+        self.assertEqual(sorted(os.listdir(self.directory)), ['log-00000002.jsonl', 'snapshot-00000002.jsonl'])
+
+        recovered, _, counts = self.open()
+        self.assertEqual(counts, (10, 2))
+        self.assertEqual(self.names(recovered), sorted([f"Amenity {i}" for i in range(1, 10)] + ["After snapshot"]))
+
+    def test_reads_and_writes_go_on_during_snapshot(self):
+        repo, journal, _ = self.open(snapshot_every=None)
+        wifi, pool = Amenity("Wi-Fi"), Amenity("Pool")
+        repo.add(wifi)
+        repo.add(pool)
+        encoding, done = threading.Event(), threading.Event()
+        encode = journal_module.encode
+
+        def slow_encode(obj):
+            # Stall the snapshot thread while it encodes the objects
+            if threading.current_thread() is snapshotter:
+                encoding.set()
+                done.wait(5)
+            return encode(obj)
+
+        def requests():
+            repo.get_all()
+            repo.add(Amenity("Sauna"))
+            repo.update(wifi.id, {'name': "Wireless"})
+            repo.delete(pool.id)
+
+        with mock.patch.object(journal_module, 'encode', slow_encode):
+            snapshotter = threading.Thread(target=journal.snapshot)
+            snapshotter.start()
+            self.assertTrue(encoding.wait(5))
+            worker = threading.Thread(target=requests)
+            worker.start()
+            worker.join(5)
+            served = not worker.is_alive()
+            done.set()
+            snapshotter.join()
+            worker.join()
+        self.assertTrue(served)
+        journal.close()
+        # The snapshot holds the objects as they were when it started
+        with open(os.path.join(self.directory, 'snapshot-00000002.jsonl')) as f:
+            self.assertEqual(sorted(json.loads(line)[1]['name'] for line in f), ["Pool", "Wi-Fi"])
+        self.assertEqual(self.names(self.open()[0]), ["Sauna", "Wireless"])
+
+    def test_background_snapshots(self):
+        repo, journal, _ = self.open(snapshot_every=20)
+        for i in range(50):
+            repo.add(Amenity(f"Amenity {i}"))
+        journal.close()
+        self.assertTrue(any(name.startswith('snapshot-') for name in os.listdir(self.directory)))
+        recovered, _, counts = self.open()
+        self.assertEqual(len(recovered.get_all()), 50)
+        self.assertLess(counts[1], 50)
+
+    def test_half_written_line_is_dropped(self):
+        repo, journal, _ = self.open()
+        repo.add(Amenity("Wi-Fi"))
+        journal.close()
+        path = os.path.join(self.directory, 'log-00000001.jsonl')
+        with open(path, 'a') as f:
+            f.write('["amenities","add",{"id":')
+
+        recovered, journal, _ = self.open()
+        self.assertEqual(self.names(recovered), ["Wi-Fi"])
+        recovered.add(Amenity("Pool"))
+        journal.close()
+        # The torn line is gone for good, so it does not stop the next recovery
+        self.assertEqual(self.names(self.open()[0]), ["Pool", "Wi-Fi"])
+
+    def test_concurrent_writers_share_fsyncs(self):
+        repo, journal, _ = self.open()
+        fsync = os.fsync
+        calls = []
+
+        def counting_fsync(fd):
+            calls.append(fd)
+            fsync(fd)
+
+        def writer(n):
+            for i in range(50):
+                repo.add(Amenity(f"{n}-{i}"))
+
+        with mock.patch.object(journal_module.os, 'fsync', counting_fsync):
+            threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(repo.get_all()), 400)
+        self.assertLess(len(calls), 400)
+
+
+class TestFacadeDurability(unittest.TestCase):
+    def test_facade_recovers_its_objects_and_links(self):
+        with tempfile.TemporaryDirectory() as directory:
+            facade = HBnBFacade(data_dir=directory)
+            owner_email, guest_email = f"{uuid.uuid4().hex}@example.com", f"{uuid.uuid4().hex}@example.com"
+            owner = facade.create_user({'first_name': "John", 'last_name': "Doe", 'email': owner_email, 'password': "secret"})
+            guest = facade.create_user({'first_name': "Jane", 'last_name': "Doe", 'email': guest_email, 'password': "secret"})
+            wifi = facade.create_amenity({'name': "Wi-Fi"})
+            place = facade.create_place({'title': "Flat", 'price': 100, 'latitude': 48.85, 'longitude': 2.35,
+                                         'owner_id': owner.id, 'amenities': [{'id': wifi.id}]})
+            review = facade.create_review({'text': "Great", 'rating': 5, 'user_id': guest.id, 'place_id': place.id})
+            facade.update_place(place.id, {'price': 120})
+            facade.journal.close()
+            User.emails -= {owner_email, guest_email}
+
+            recovered = HBnBFacade(data_dir=directory)
+            self.addCleanup(recovered.journal.close)
+            restored = recovered.get_place(place.id)
+            self.assertEqual(restored.to_dict(), place.to_dict())
+            self.assertEqual(restored.amenities, [{'id': wifi.id}])
+            self.assertEqual([r.to_dict() for r in restored.reviews], [review.to_dict()])
+            self.assertEqual(recovered.get_user(owner.id).places, [restored])
+            self.assertTrue(recovered.get_user_by_email(guest_email).check_password("secret"))
+            self.assertEqual(recovered.get_nearby_places(48.85, 2.35, 1)[0][1], restored)
+            recovered.journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
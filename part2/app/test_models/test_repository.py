@@ -0,0 +1,146 @@
+import unittest
+import uuid
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.user import User
+from app.persistence.repository import InMemoryRepository
+
+
+def make_user():
+    return User(first_name="John", last_name="Doe", email=f"{uuid.uuid4().hex}@example.com", password="secret")
+
+
+def make_place(owner, title="Flat", price=100):
+    return Place(title=title, price=price, latitude=48.85, longitude=2.35, owner=owner)
+
+
+class TestAttributeIndexes(unittest.TestCase):
+    def test_unique_index_lookup(self):
+        repo = InMemoryRepository(unique=('name',))
+        wifi = Amenity("Wi-Fi")
+        repo.add(wifi)
+        repo.add(Amenity("Pool"))
+        self.assertIs(repo.get_by_attribute('name', "Wi-Fi"), wifi)
+        self.assertIsNone(repo.get_by_attribute('name', "Sauna"))
+
+    def test_unique_index_refuses_duplicates(self):
+        repo = InMemoryRepository(unique=('name',))
+        wifi = Amenity("Wi-Fi")
+        pool = Amenity("Pool")
+        repo.add(wifi)
+        repo.add(pool)
+        with self.assertRaises(ValueError) as context:
+            repo.add(Amenity("Wi-Fi"))
+        self.assertEqual(str(context.exception), "name already exists")
+        with self.assertRaises(ValueError):
+            repo.update(pool.id, {'name': "Wi-Fi"})
+        self.assertEqual(pool.name, "Pool")
+        # Updating an object to its own value is not a conflict
+        repo.update(wifi.id, {'name': "Wi-Fi"})
+
+    def test_update_and_delete_keep_index_consistent(self):
+        repo = InMemoryRepository(unique=('name',))
+        wifi = Amenity("Wi-Fi")
+        repo.add(wifi)
+        repo.update(wifi.id, {'name': "Wireless"})
+        self.assertIsNone(repo.get_by_attribute('name', "Wi-Fi"))
+        self.assertIs(repo.get_by_attribute('name', "Wireless"), wifi)
+        repo.add(Amenity("Wi-Fi"))
+        repo.delete(wifi.id)
+        self.assertIsNone(repo.get_by_attribute('name', "Wireless"))
+
+    def test_failed_update_keeps_index_consistent(self):
+        repo = InMemoryRepository(indexes=('name',))
+        wifi = Amenity("Wi-Fi")
+        repo.add(wifi)
+        with self.assertRaises(ValueError):
+            repo.update(wifi.id, {'name': ""})
+        self.assertIs(repo.get_by_attribute('name', "Wi-Fi"), wifi)
+
+    def test_non_unique_dotted_index(self):
+        repo = InMemoryRepository(indexes=('owner.id',))
+        owner, other = make_user(), make_user()
+        first, second = make_place(owner, "First"), make_place(owner, "Second")
+        for place in (first, make_place(other), second):
+            repo.add(place)
+        self.assertEqual(repo.get_all_by_attribute('owner.id', owner.id), [first, second])
+        self.assertIs(repo.get_by_attribute('owner.id', owner.id), first)
+        repo.delete(first.id)
+        self.assertEqual(repo.get_all_by_attribute('owner.id', owner.id), [second])
+        repo.delete(second.id)
+        self.assertEqual(repo.get_all_by_attribute('owner.id', owner.id), [])
+        self.assertNotIn(owner.id, repo._indexes['owner.id'])
+
+    def test_unindexed_attribute_falls_back_to_scan(self):
+        repo = InMemoryRepository()
+        wifi = Amenity("Wi-Fi")
+        repo.add(wifi)
+        self.assertIs(repo.get_by_attribute('name', "Wi-Fi"), wifi)
+        self.assertIs(repo.get_by_attribute('id', wifi.id), wifi)
+        self.assertEqual(repo.get_all_by_attribute('name', "Wi-Fi"), [wifi])
+
+
+class TestOrderedIndexes(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryRepository(ordered=('price', 'created_at'))
+        owner = make_user()
+        self.places = [make_place(owner, price=price) for price in (50, 10, 30, 30, 70, 20)]
+        for place in self.places:
+            self.repo.add(place)
+
+    def prices(self, places):
+        return [place.price for place in places]
+
+    def test_range_bounds_are_inclusive(self):
+        places, cursor = self.repo.range('price', 20, 50)
+        self.assertEqual(self.prices(places), [20, 30, 30, 50])
+        self.assertIsNone(cursor)
+        self.assertEqual(self.prices(self.repo.range('price', lo=60)[0]), [70])
+        self.assertEqual(self.prices(self.repo.range('price', hi=10)[0]), [10])
+        self.assertEqual(self.repo.range('price', 80, 90), ([], None))
+
+    def test_range_pages(self):
+        seen = []
+        cursor = None
+        while True:
+            places, cursor = self.repo.range('price', 20, None, limit=2, after=cursor)
+            seen += places
+            if cursor is None:
+                break
+        self.assertEqual(self.prices(seen), [20, 30, 30, 50, 70])
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_range_reverse_pages(self):
+        places, cursor = self.repo.range('price', limit=4, reverse=True)
+        self.assertEqual(self.prices(places), [70, 50, 30, 30])
+        places, cursor = self.repo.range('price', limit=4, after=cursor, reverse=True)
+        self.assertEqual(self.prices(places), [20, 10])
+        self.assertIsNone(cursor)
+
+    def test_iter_ordered(self):
+        self.assertEqual(self.prices(self.repo.iter_ordered('price')), [10, 20, 30, 30, 50, 70])
+        newest = list(self.repo.iter_ordered('created_at', reverse=True))
+        self.assertEqual(newest, sorted(self.places, key=lambda place: (place.created_at, place.id), reverse=True))
+
+    def test_update_and_delete_move_entries(self):
+        cheapest = self.places[1]
+        self.repo.update(cheapest.id, {'price': 100})
+        self.assertEqual(self.prices(self.repo.iter_ordered('price')), [20, 30, 30, 50, 70, 100])
+        self.repo.delete(cheapest.id)
+        self.assertEqual(self.prices(self.repo.iter_ordered('price')), [20, 30, 30, 50, 70])
+        self.assertEqual(len(self.repo._ordered['created_at']), 5)
+
+    def test_load_sorts_once(self):
+        owner = self.places[0].owner
+        loaded = [make_place(owner, price=price) for price in (40, 5, 60)]
+        self.repo.load(loaded)
+        self.assertEqual(self.prices(self.repo.iter_ordered('price')), [5, 10, 20, 30, 30, 40, 50, 60, 70])
+        self.repo.delete(loaded[1].id)
+        self.assertEqual(self.prices(self.repo.range('price', hi=10)[0]), [10])
+        with self.assertRaises(ValueError):
+            self.repo.load([make_place(owner), self.places[0]])
+        self.assertEqual(len(self.repo.get_all()), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
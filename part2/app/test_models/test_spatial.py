@@ -0,0 +1,68 @@
+import random
+import unittest
+import uuid
+from app.models.place import Place
+from app.models.user import User
+from app.persistence.repository import InMemoryRepository
+from app.persistence.spatial import GridIndex, haversine_km
+
+
+class TestGridIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.owner = User(first_name="John", last_name="Doe", email=f"{uuid.uuid4().hex}@example.com", password="secret")
+
+    def setUp(self):
+        self.repo = InMemoryRepository(grid=GridIndex(cell_size=1.0))
+
+    def add(self, lat, lon):
+        place = Place(title="Flat", price=100, latitude=lat, longitude=lon, owner=self.owner)
+        self.repo.add(place)
+        return place
+
+    def test_nearest_matches_linear_scan(self):
+        rng = random.Random(7)
+        places = [self.add(rng.uniform(-89.9, 89.9), rng.uniform(-179.9, 179.9)) for _ in range(500)]
+        # Dense cluster, antimeridian and near the poles
+        places += [self.add(rng.uniform(48, 49), rng.uniform(2, 3)) for _ in range(200)]
+        for lat, lon in [(48.5, 2.5), (0.0, 179.9), (-10.0, -179.95), (89.5, 10.0), (-89.0, 0.0), (30.0, 60.0)]:
+            expected = sorted(places, key=lambda place: haversine_km(lat, lon, place.latitude, place.longitude))[:10]
+            found = self.repo.nearest(lat, lon, 10)
+            self.assertEqual([place for _, place in found], expected)
+            self.assertEqual([distance for distance, _ in found], sorted(distance for distance, _ in found))
+
+    def test_nearest_within_radius(self):
+        paris = self.add(48.8566, 2.3522)
+        versailles = self.add(48.8049, 2.1204)
+        self.add(45.764, 4.8357)
+        found = self.repo.nearest(48.8566, 2.3522, 10, radius_km=50)
+        self.assertEqual([place for _, place in found], [paris, versailles])
+        self.assertEqual(self.repo.nearest(0.0, 0.0, 10, radius_km=50), [])
+
+    def test_bbox(self):
+        inside = self.add(10.5, 20.5)
+        self.add(12.5, 20.5)
+        east = self.add(0.5, 179.5)
+        west = self.add(-0.5, -179.5)
+        self.assertEqual(self.repo.in_bbox(10.0, 11.0, 20.0, 21.0), [inside])
+        self.assertCountEqual(self.repo.in_bbox(-1.0, 1.0, 179.0, -179.0), [east, west])
+
+    def test_setters_move_places(self):
+        place = self.add(10.5, 20.5)
+        place.latitude = 40.5
+        place.longitude = -70.5
+        self.assertEqual(self.repo.in_bbox(10.0, 11.0, 20.0, 21.0), [])
+        self.assertEqual(self.repo.in_bbox(40.0, 41.0, -71.0, -70.0), [place])
+        self.repo.update(place.id, {'latitude': 1.5, 'longitude': 1.5})
+        self.assertEqual(self.repo.nearest(1.0, 1.0, 1)[0][1], place)
+
+    def test_deleted_places_are_forgotten(self):
+        place = self.add(10.5, 20.5)
+        self.repo.delete(place.id)
+        place.latitude = 11.5
+        self.assertEqual(self.repo.nearest(10.5, 20.5, 5), [])
+        self.assertEqual(len(self.repo._grid), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
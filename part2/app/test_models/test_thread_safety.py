@@ -0,0 +1,115 @@
+import sys
+import threading
+import unittest
+import uuid
+from app.models.amenity import Amenity
+from app.models.user import User
+from app.persistence.repository import ThreadSafeInMemoryRepository
+from app.persistence.rwlock import Mutex, RWLock
+
+
+def run_threads(targets):
+    errors = []
+
+    def guarded(target):
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class TestThreadSafeRepository(unittest.TestCase):
+    def setUp(self):
+        # Switch threads often so that the races have a chance to happen
+        self.interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+
+    def test_concurrent_writes_and_reads(self):
+        for lock in (RWLock, Mutex):
+            with self.subTest(lock=lock.__name__):
+                self.check_concurrent_writes_and_reads(lock())
+
+    def check_concurrent_writes_and_reads(self, lock):
+        # Lookups on created_at, not indexed, scan the storage while writers change it
+        repo = ThreadSafeInMemoryRepository(unique=('name',), ordered=('name',), lock=lock)
+        kept = []
+
+        def writer(n):
+            def run():
+                for i in range(300):
+                    amenity = Amenity(f"{n}-{i}")
+                    repo.add(amenity)
+                    repo.update(amenity.id, {'name': f"{n}-{i}-renamed"})
+                    if i % 2:
+                        repo.delete(amenity.id)
+                    else:
+                        kept.append(amenity)
+            return run
+
+        def reader():
+            for _ in range(300):
+                for amenity in repo.get_all()[:20]:
+                    repo.get_by_attribute('name', amenity.name)
+                repo.get_all_by_attribute('created_at', None)
+                repo.range('name', limit=10)
+
+        errors = run_threads([writer(n) for n in range(4)] + [reader] * 4)
+        self.assertEqual(errors, [])
+        self.assertCountEqual(repo.get_all(), kept)
+        self.assertEqual(len(repo._unique['name']), len(kept))
+        self.assertEqual(len(repo._ordered['name']), len(kept))
+        for amenity in kept:
+            self.assertIs(repo.get_by_attribute('name', amenity.name), amenity)
+
+    def test_concurrent_registrations_with_one_email(self):
+        email = f"{uuid.uuid4().hex}@example.com"
+        repo = ThreadSafeInMemoryRepository(unique=('email',))
+
+        def register():
+            repo.add(User(first_name="John", last_name="Doe", email=email, password="secret"))
+
+        errors = run_threads([register] * 8)
+        self.assertEqual(len(errors), 7)
+        self.assertTrue(all(str(e) == "Email already exists" for e in errors))
+        self.assertEqual(len(repo.get_all()), 1)
+
+
+class TestRWLock(unittest.TestCase):
+    def test_readers_share_the_lock(self):
+        lock = RWLock()
+        inside = threading.Barrier(3, timeout=5)
+
+        def reader():
+            with lock.read():
+                inside.wait()
+
+        self.assertEqual(run_threads([reader] * 3), [])
+
+    def test_waiting_writer_blocks_new_readers(self):
+        lock = RWLock()
+        lock.acquire_read()
+        order = []
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), order.append('write'), lock.release_write()))
+        writer.start()
+        while not lock._waiting_writers:
+            pass
+        reader = threading.Thread(target=lambda: (lock.acquire_read(), order.append('read'), lock.release_read()))
+        reader.start()
+        lock.release_read()
+        writer.join(5)
+        reader.join(5)
+        self.assertEqual(order, ['write', 'read'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""get_by_attribute with and without a hash index on the attribute.
+
+Stores amenities in one repository indexed on name and one without
+index, then times lookups of random names (the path of every e-mail
+check on signup) in both.
+
+Usage: python benchmarks/bench_attribute_index.py [objects] [lookups]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.amenity import Amenity
+from app.persistence.repository import InMemoryRepository
+
+
+def bench(repo, names):
+    start = time.perf_counter()
+    for name in names:
+        repo.get_by_attribute('name', name)
+    return (time.perf_counter() - start) / len(names)
+
+
+if __name__ == '__main__':
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rng = random.Random(42)
+
+    amenities = [Amenity(f'amenity-{i}') for i in range(objects)]
+    indexed = InMemoryRepository(unique=('name',))
+    scanned = InMemoryRepository()
+    start = time.perf_counter()
+    for amenity in amenities:
+        indexed.add(amenity)
+    print(f'add, indexed: {(time.perf_counter() - start) / objects * 1e6:.2f} us per object')
+    start = time.perf_counter()
+    for amenity in amenities:
+        scanned.add(amenity)
+    print(f'add, no index: {(time.perf_counter() - start) / objects * 1e6:.2f} us per object')
+
+    names = [f'amenity-{rng.randrange(objects)}' for _ in range(lookups)]
+    print(f'lookup over {objects} objects, indexed: {bench(indexed, names * 1000) * 1e6:.2f} us')
+    print(f'lookup over {objects} objects, no index: {bench(scanned, names) * 1e3:.2f} ms')
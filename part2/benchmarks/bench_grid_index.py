@@ -0,0 +1,58 @@
+"""Nearby and bounding-box place searches: grid index vs linear scan.
+
+For each size, stores places spread over Europe in a repository with a
+GridIndex, then times 20-nearest and ~20 km bounding-box queries around
+random points through the grid, and the same queries scanning every place.
+
+Usage: python benchmarks/bench_grid_index.py [size ...] (default: 100000 1000000)
+About 1 GB of memory per million places.
+"""
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.place import Place
+from app.models.user import User
+from app.persistence.repository import InMemoryRepository
+from app.persistence.spatial import GridIndex, haversine_km
+
+
+def bench(queries, run):
+    start = time.perf_counter()
+    for query in queries:
+        run(*query)
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def scan_nearest(places, lat, lon, k):
+    return heapq.nsmallest(k, places, key=lambda place: haversine_km(lat, lon, place.latitude, place.longitude))
+
+
+def scan_bbox(places, min_lat, max_lat, min_lon, max_lon):
+    return [place for place in places
+            if min_lat <= place.latitude <= max_lat and min_lon <= place.longitude <= max_lon]
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    owner = User('Bench', 'Owner', 'bench.owner@example.com', 'password')
+    for size in sizes:
+        rng = random.Random(42)
+        repo = InMemoryRepository(grid=GridIndex())
+        for i in range(size):
+            repo.add(Place(f'Place {i}', 100, rng.uniform(36.0, 60.0), rng.uniform(-10.0, 30.0), owner))
+        places = repo.get_all()
+        points = [(rng.uniform(36.0, 60.0), rng.uniform(-10.0, 30.0)) for _ in range(200)]
+        boxes = [(lat - 0.1, lat + 0.1, lon - 0.15, lon + 0.15) for lat, lon in points]
+        scanned = points[:3]
+
+        print(f'{size} places')
+        print(f'  20 nearest, grid: {bench(points, lambda lat, lon: repo.nearest(lat, lon, 20)):.3f} ms')
+        print(f'  20 nearest, scan: {bench(scanned, lambda lat, lon: scan_nearest(places, lat, lon, 20)):.1f} ms')
+        print(f'  bbox, grid: {bench(boxes, repo.in_bbox):.3f} ms')
+        print(f'  bbox, scan: {bench(boxes[:3], lambda *box: scan_bbox(places, *box)):.1f} ms')
+        del repo, places
@@ -0,0 +1,55 @@
+"""Price filter and newest-first pages: ordered indexes vs sorting get_all().
+
+Stores places with random prices, then times the first 20 results of
+price-range and newest-first queries through InMemoryRepository.range(),
+against filtering and sorting the whole repository on every request.
+
+Usage: python benchmarks/bench_range_index.py [places] [queries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.place import Place
+from app.models.user import User
+from app.persistence.repository import InMemoryRepository
+
+
+def bench(label, queries, run):
+    start = time.perf_counter()
+    for query in queries:
+        run(*query)
+    print(f'{label}: {(time.perf_counter() - start) / len(queries) * 1e3:.3f} ms')
+
+
+if __name__ == '__main__':
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = random.Random(42)
+
+    owner = User('Bench', 'Owner', 'bench.owner@example.com', 'password')
+    indexed = InMemoryRepository(ordered=('price', 'created_at'))
+    plain = InMemoryRepository()
+    start = time.perf_counter()
+    for i in range(places):
+        place = Place(f'Place {i}', rng.randrange(20, 500), 48.0, 2.0, owner)
+        indexed.add(place)
+        plain.add(place)
+    print(f'{places} places stored in {time.perf_counter() - start:.1f} s')
+
+    price_queries = []
+    for _ in range(queries):
+        low = rng.randrange(20, 480)
+        price_queries.append((low, low + 20))
+
+    bench('price range, ordered index', price_queries, lambda lo, hi: indexed.range('price', lo, hi, limit=20))
+    bench('price range, sorting get_all()', price_queries, lambda lo, hi: sorted(
+        (place for place in plain.get_all() if lo <= place.price <= hi),
+        key=lambda place: (place.price, place.id))[:20])
+    bench('newest first, ordered index', [()] * queries,
+          lambda: indexed.range('created_at', limit=20, reverse=True))
+    bench('newest first, sorting get_all()', [()] * queries,
+          lambda: sorted(plain.get_all(), key=lambda place: place.created_at, reverse=True)[:20])
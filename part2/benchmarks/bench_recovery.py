@@ -0,0 +1,72 @@
+"""Restart time of a facade kept in HBNB_DATA_DIR.
+
+Creates users, amenities, places and reviews through a facade with a
+data directory, takes a snapshot once 90% of them exist and logs the
+rest, then times the start of a new facade on the same directory:
+loading the snapshot, replaying the log tail and linking the objects.
+
+Usage: python benchmarks/bench_recovery.py [entities]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.user import User
+from app.services.facade import HBnBFacade
+
+
+def populate(facade, entities, snapshot_at, rng):
+    users = [facade.create_user({'first_name': 'Bench', 'last_name': str(i), 'email': f'bench{i}@example.com',
+                                 'password': 'password'}) for i in range(100)]
+    amenities = [facade.create_amenity({'name': f'Amenity {i}'}) for i in range(1000)]
+    created = len(users) + len(amenities)
+    places = []
+    places_wanted = int(entities * 0.8)
+    while created < entities:
+        if created == snapshot_at:
+            start = time.perf_counter()
+            facade.journal.snapshot()
+            print(f'snapshot of {created} entities: {time.perf_counter() - start:.1f} s')
+        if len(places) < places_wanted:
+            places.append(facade.create_place({
+                'title': f'Place {created}', 'price': rng.randrange(20, 500),
+                'latitude': rng.uniform(36.0, 60.0), 'longitude': rng.uniform(-10.0, 30.0),
+                'owner_id': rng.choice(users).id, 'amenities': [{'id': rng.choice(amenities).id}],
+            }))
+        else:
+            facade.create_review({'text': 'Nice', 'rating': rng.randint(2, 5),
+                                  'user_id': rng.choice(users).id, 'place_id': rng.choice(places).id})
+        created += 1
+
+
+if __name__ == '__main__':
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        facade = HBnBFacade(data_dir=directory)
+        # Bulk load: do not wait for an fsync per entity
+        facade.journal.sync = False
+        facade.journal.snapshot_every = None
+        start = time.perf_counter()
+        populate(facade, entities, int(entities * 0.9), rng)
+        facade.journal.close()
+        print(f'{entities} entities created and logged in {time.perf_counter() - start:.1f} s')
+        sizes = {name: os.path.getsize(os.path.join(directory, name)) for name in sorted(os.listdir(directory))}
+        print('files: ' + ', '.join(f'{name} {size / 1e6:.0f} MB' for name, size in sizes.items()))
+
+        del facade
+        User.emails.clear()
+        gc.collect()
+
+        start = time.perf_counter()
+        recovered = HBnBFacade(data_dir=directory)
+        elapsed = time.perf_counter() - start
+        recovered.journal.close()
+        count = sum(len(repo.get_all()) for repo in (recovered.user_repo, recovered.amenity_repo,
+                                                     recovered.place_repo, recovered.review_repo))
+        print(f'recovery of {count} entities: {elapsed:.1f} s ({count / elapsed:,.0f} entities/s)')
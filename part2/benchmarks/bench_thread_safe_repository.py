@@ -0,0 +1,67 @@
+"""Throughput of ThreadSafeInMemoryRepository under a read-mostly load.
+
+Threads run a mix of get(), indexed get_by_attribute() and update()
+calls against repositories of amenities. The reader-writer lock is
+compared with one mutex around every call, and with the unlocked
+repository on a single thread. Reads only run in parallel on a
+free-threaded Python with several CPUs.
+
+Usage: python benchmarks/bench_thread_safe_repository.py [objects] [operations] [write %]
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.amenity import Amenity
+from app.persistence.repository import InMemoryRepository, ThreadSafeInMemoryRepository
+from app.persistence.rwlock import Mutex, RWLock
+
+
+def worker(repo, amenities, operations, write_percent, seed):
+    rng = random.Random(seed)
+    for _ in range(operations):
+        amenity = rng.choice(amenities)
+        roll = rng.randrange(100)
+        if roll < write_percent:
+            repo.update(amenity.id, {'name': amenity.name})
+        elif roll % 2:
+            repo.get(amenity.id)
+        else:
+            repo.get_by_attribute('name', amenity.name)
+
+
+def throughput(repo, amenities, threads, operations, write_percent):
+    per_thread = operations // threads
+    workers = [threading.Thread(target=worker, args=(repo, amenities, per_thread, write_percent, seed))
+               for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    write_percent = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    amenities = [Amenity(f'amenity-{i}') for i in range(objects)]
+    print(f'{objects} objects, {operations} operations, {write_percent}% writes, {os.cpu_count()} CPU(s)')
+
+    repo = InMemoryRepository(indexes=('name',))
+    for amenity in amenities:
+        repo.add(amenity)
+    print(f'  no lock, 1 thread: {throughput(repo, amenities, 1, operations, write_percent):,.0f} ops/s')
+
+    for label, lock in (('reader-writer lock', RWLock), ('mutex', Mutex)):
+        repo = ThreadSafeInMemoryRepository(indexes=('name',), lock=lock())
+        for amenity in amenities:
+            repo.add(amenity)
+        for threads in (1, 2, 4, 8):
+            ops = throughput(repo, amenities, threads, operations, write_percent)
+            print(f'  {label}, {threads} thread(s): {ops:,.0f} ops/s')
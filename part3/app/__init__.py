@@ -4,10 +4,12 @@ from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 import config
+from app.persistence.routing import RoutingSession
 
 bcrypt = Bcrypt()
 jwt = JWTManager()
-db = SQLAlchemy()
+# Les objets restent chargés après commit : les réponses des écritures ne relisent pas la base
+db = SQLAlchemy(session_options={'expire_on_commit': False, 'class_': RoutingSession})
 
 from app.api.v1.users import api as users_ns
 from app.api.v1.amenities import api as amenities_ns
@@ -15,6 +17,11 @@ from app.api.v1.places import api as places_ns
 from app.api.v1.reviews import api as reviews_ns
 from app.api.v1.auth import api as auth_ns
 from app.api.v1.protected import api as protected_ns
+from app.cli import (rebuild_ratings_command, rebuild_search_index_command,
+                     rebuild_spatial_index_command, refresh_replica_command, upgrade_db_command)
+from app.persistence import instrumentation, routing
+from app.persistence.sqlite import apply_pragmas
+from app.services import facade
 
 def create_app(config_class=config.DevelopmentConfig):
     # Création de l'application
@@ -26,6 +33,22 @@ def create_app(config_class=config.DevelopmentConfig):
     bcrypt.init_app(app)
     jwt.init_app(app)
     db.init_app(app)
+    with app.app_context():
+        apply_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
+        # Nombre de requêtes SQL et durée par requête HTTP, log des requêtes lentes
+        instrumentation.install(app, db.engine)
+
+    # Base en lecture seule pour les lectures des requêtes GET
+    read_uri = app.config.get('READ_DATABASE_URI')
+    if not read_uri and app.config.get('READ_REPLICA_PATH'):
+        read_uri = routing.read_only_uri(app.config['READ_REPLICA_PATH'])
+    if read_uri:
+        read_engine = routing.install(app, db, read_uri)
+        apply_pragmas(read_engine, app.config.get('SQLITE_READ_PRAGMAS'))
+        instrumentation.watch(read_engine, app.config.get('SLOW_QUERY_MS'))
+
+    # Cache de lecture devant les repositories
+    facade.configure_cache(app.config.get('REPOSITORY_CACHE_SIZE', 0), app.config.get('REPOSITORY_CACHE_TTL'))
     
     # Configuration de l'API
     authorizations = {
@@ -48,4 +71,11 @@ def create_app(config_class=config.DevelopmentConfig):
     api.add_namespace(auth_ns, path='/api/v1/auth')
     api.add_namespace(protected_ns, path='/api/v1/protected')
 
+    # Commandes CLI (flask upgrade-db, ...)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(rebuild_ratings_command)
+    app.cli.add_command(rebuild_spatial_index_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(refresh_replica_command)
+
     return app
@@ -1,6 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.api.v1.pagination import pagination_parser, paginate
 
 
 api = Namespace('amenities', description='Amenity operations')
@@ -39,11 +40,12 @@ class AmenityList(Resource):
         except Exception as e:
             return {'error': str(e).strip("'")}, 400
 
+    @api.expect(pagination_parser)
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
     def get(self):
         """Retrieve a list of all amenities"""
-        amenities = facade.get_all_amenities()
-        return [amenity.to_dict() for amenity in amenities], 200
+        return paginate(facade.get_amenities_page, lambda amenity: amenity.to_dict())
 
 
 @api.route('/<amenity_id>')
@@ -0,0 +1,51 @@
+import base64
+import binascii
+from urllib.parse import urlencode
+from flask import request
+from flask_restx import reqparse
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+pagination_parser = reqparse.RequestParser()
+pagination_parser.add_argument('limit', type=int, location='args', help='Maximum number of items to return (default 100, max 500)')
+pagination_parser.add_argument('cursor', type=str, location='args', help='Cursor of the next page, taken from the Link header')
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        return base64.b64decode(cursor.encode('ascii'), altchars=b'-_', validate=True).decode('utf-8')
+    except (binascii.Error, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+
+def paginate(fetch_page, serialize):
+    """Serve one page of a collection.
+
+    `fetch_page(limit, after)` must return the items and the key to resume
+    from, so the lookup is a keyset seek whatever the page depth. The body
+    stays a plain list; the next page is advertised in the Link header.
+    """
+    args = pagination_parser.parse_args()
+    limit = args['limit'] if args['limit'] is not None else DEFAULT_LIMIT
+    if not 1 <= limit <= MAX_LIMIT:
+        return {'error': f'limit must be between 1 and {MAX_LIMIT}'}, 400
+    try:
+        after = decode_cursor(args['cursor']) if args['cursor'] else None
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    items, next_key = fetch_page(limit, after)
+    # Readable by the frontend's fetch() across origins, which follows the cursor
+    headers = {'Access-Control-Expose-Headers': 'Link, X-Next-Cursor'}
+    if next_key is not None:
+        cursor = encode_cursor(next_key)
+        query = request.args.to_dict(flat=False)
+        query.update({'limit': [str(limit)], 'cursor': [cursor]})
+        headers['Link'] = f'<{request.base_url}?{urlencode(query, doseq=True)}>; rel="next"'
+        headers['X-Next-Cursor'] = cursor
+    return [serialize(item) for item in items], 200, headers
@@ -1,6 +1,7 @@
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, reqparse
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.api.v1.pagination import MAX_LIMIT, pagination_parser, paginate
 
 api = Namespace('places', description='Place operations')
 
@@ -27,6 +28,22 @@ place_model = api.model('Place', {
     'amenities': fields.List(fields.String, description="List of amenities ID's")
 })
 
+# Fields a PUT may change; any other key is rejected with 400 (amenities are
+# added through /places/<place_id>/amenities, the owner cannot change)
+place_update_model = api.model('PlaceUpdate', {
+    'title': fields.String(description='Title of the place'),
+    'description': fields.String(description='Description of the place'),
+    'price': fields.Float(description='Price per night'),
+    'latitude': fields.Float(description='Latitude of the place'),
+    'longitude': fields.Float(description='Longitude of the place')
+})
+
+place_filter_parser = pagination_parser.copy()
+place_filter_parser.add_argument('min_price', type=float, location='args', help='Minimum price per night')
+place_filter_parser.add_argument('max_price', type=float, location='args', help='Maximum price per night')
+place_filter_parser.add_argument('amenity', type=str, action='append', location='args', help='Amenity ID the place must offer (repeatable, all must match)')
+place_filter_parser.add_argument('owner_id', type=str, location='args', help='ID of the owner')
+
 @api.route('/')
 class PlaceList(Resource):
     @api.expect(place_model)
@@ -46,11 +63,66 @@ class PlaceList(Resource):
         except Exception as e:
             return {'error': str(e).strip("'")}, 400
 
+    @api.expect(place_filter_parser)
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid pagination or filter parameters')
+    def get(self):
+        """Retrieve a list of places, optionally filtered by price, amenities and owner"""
+        filters = place_filter_parser.parse_args()
+        return paginate(
+            lambda limit, after: facade.search_places_page(
+                limit, after,
+                min_price=filters['min_price'],
+                max_price=filters['max_price'],
+                amenity_ids=filters['amenity'] or (),
+                owner_id=filters['owner_id']),
+            lambda place: place.to_dict_list())
+
+NEARBY_DEFAULT_LIMIT = 20
+NEARBY_MAX_RADIUS_KM = 500
+
+nearby_parser = reqparse.RequestParser()
+nearby_parser.add_argument('lat', type=float, required=True, location='args', help='Latitude of the center')
+nearby_parser.add_argument('lon', type=float, required=True, location='args', help='Longitude of the center')
+nearby_parser.add_argument('radius_km', type=float, default=10.0, location='args', help=f'Search radius in km (default 10, max {NEARBY_MAX_RADIUS_KM})')
+nearby_parser.add_argument('limit', type=int, default=NEARBY_DEFAULT_LIMIT, location='args', help=f'Maximum number of places to return (default {NEARBY_DEFAULT_LIMIT}, max {MAX_LIMIT})')
+
+@api.route('/nearby')
+class PlaceNearby(Resource):
+    @api.expect(nearby_parser)
+    @api.response(200, 'Places within the radius, closest first')
+    @api.response(400, 'Invalid input data')
+    def get(self):
+        """Find the places closest to a point"""
+        args = nearby_parser.parse_args()
+        if not -90 <= args['lat'] <= 90 or not -180 <= args['lon'] <= 180:
+            return {'error': 'lat must be between -90 and 90 and lon between -180 and 180'}, 400
+        if not 0 < args['radius_km'] <= NEARBY_MAX_RADIUS_KM:
+            return {'error': f'radius_km must be between 0 and {NEARBY_MAX_RADIUS_KM}'}, 400
+        if not 1 <= args['limit'] <= MAX_LIMIT:
+            return {'error': f'limit must be between 1 and {MAX_LIMIT}'}, 400
+        results = facade.get_places_nearby(args['lat'], args['lon'], args['radius_km'], args['limit'])
+        return [dict(place.to_dict(), distance_km=round(distance, 3)) for place, distance in results], 200
+
+search_parser = pagination_parser.copy()
+search_parser.add_argument('q', type=str, required=True, location='args', help='Words to look for in place titles, descriptions and reviews')
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.expect(search_parser)
+    @api.response(200, 'Matching places, best match first')
+    @api.response(400, 'Invalid input data')
     def get(self):
-        """Retrieve a list of all places"""
-        places = facade.get_all_places()
-        return [place.to_dict_list() for place in places], 200
+        """Full-text search over places and their reviews"""
+        q = search_parser.parse_args()['q']
+        if not q.strip():
+            return {'error': 'q must not be empty'}, 400
+        try:
+            return paginate(
+                lambda limit, after: facade.search_places_text(q, limit, after),
+                lambda hit: dict(hit[0].to_dict(), snippet=hit[1]))
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
@@ -63,7 +135,7 @@ class PlaceResource(Resource):
             return {'error': 'Place not found'}, 404
         return place.to_dict_list(), 200
 
-    @api.expect(place_model)
+    @api.expect(place_update_model)
     @api.response(200, 'Place updated successfully')
     @api.response(404, 'Place not found')
     @api.response(400, 'Invalid input data')
@@ -75,17 +147,16 @@ class PlaceResource(Resource):
         """Update a place's information"""
         place_data = api.payload
         current_user = get_jwt_identity()
-        place = facade.get_place(place_id)
         admin = get_jwt()['is_admin']
-        if not place:
-            return {'error': 'Place not found'}, 404
-        if place.owner.id != current_user and not admin:
-            return {'error': 'Forbidden'}, 403
         try:
-            place = facade.update_place(place_id, place_data)
-            return place.to_dict(), 200
+            place = facade.update_place(place_id, place_data, None if admin else current_user)
+        except PermissionError:
+            return {'error': 'Forbidden'}, 403
         except Exception as e:
             return {'error': str(e).strip("'")}, 400
+        if not place:
+            return {'error': 'Place not found'}, 404
+        return place.to_dict(), 200
     
     @api.response(200, 'Place deleted successfully')
     @api.response(404, 'Place not found')
@@ -96,17 +167,16 @@ class PlaceResource(Resource):
     def delete(self, place_id):
         """Update a place's information"""
         current_user = get_jwt_identity()
-        place = facade.get_place(place_id)
         admin = get_jwt()['is_admin']
-        if not place:
-            return {'error': 'Place not found'}, 404
-        if place.owner.id != current_user and not admin:
-            return {'error': 'Forbidden'}, 403
         try:
-            place = facade.delete_place(place_id)
-            return {'message': 'Place deleted successfully'}, 200
+            deleted = facade.delete_place(place_id, None if admin else current_user)
+        except PermissionError:
+            return {'error': 'Forbidden'}, 403
         except Exception as e:
             return {'error': str(e).strip("'")}, 400
+        if not deleted:
+            return {'error': 'Place not found'}, 404
+        return {'message': 'Place deleted successfully'}, 200
 
 @api.route('/<place_id>/amenities')
 class PlaceAmenities(Resource):
@@ -123,17 +193,15 @@ class PlaceAmenities(Resource):
         if not place:
             return {'error': 'Place not found'}, 404
         
-        for amenity in amenities_data:
-            a = facade.get_amenity(amenity['id'])
-            if not a:
-                return {'error': 'Invalid input data'}, 400
-        
-        for amenity in amenities_data:
-            place.add_amenity(amenity)
+        try:
+            facade.add_amenities_to_place(place_id, amenities_data)
+        except Exception as e:
+            return {'error': str(e).strip("'")}, 400
         return {'message': 'Amenities added successfully'}, 200
 
 @api.route('/<place_id>/reviews/')
 class PlaceReviewList(Resource):
+    @api.expect(pagination_parser)
     @api.response(200, 'List of reviews for the place retrieved successfully')
     @api.response(404, 'Place not found')
     def get(self, place_id):
@@ -141,5 +209,5 @@ class PlaceReviewList(Resource):
         place = facade.get_place(place_id)
         if not place:
             return {'error': 'Place not found'}, 404
-        return [review.to_dict() for review in place.reviews], 200
+        return paginate(lambda limit, after: facade.get_reviews_page_by_place(place_id, limit, after), lambda review: review.to_dict())
     
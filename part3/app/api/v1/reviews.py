@@ -1,6 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.api.v1.pagination import pagination_parser, paginate
 
 api = Namespace('reviews', description='Review operations')
 
@@ -11,6 +12,12 @@ review_model = api.model('Review', {
     'place_id': fields.String(required=True, description='ID of the place')
 })
 
+# Fields a PUT may change; any other key is rejected with 400
+review_update_model = api.model('ReviewUpdate', {
+    'text': fields.String(description='Text of the review'),
+    'rating': fields.Integer(description='Rating of the place (1-5)')
+})
+
 @api.route('/')
 class ReviewList(Resource):
     @api.expect(review_model)
@@ -29,10 +36,12 @@ class ReviewList(Resource):
         except Exception as e:
             return {"error": str(e).strip("'")}, 400
 
+    @api.expect(pagination_parser)
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
     def get(self):
         """Retrieve a list of all reviews"""
-        return [review.to_dict() for review in facade.get_all_reviews()], 200
+        return paginate(facade.get_reviews_page, lambda review: review.to_dict())
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
@@ -45,7 +54,7 @@ class ReviewResource(Resource):
             return {'error': 'Review not found'}, 404
         return review.to_dict(), 200
 
-    @api.expect(review_model)
+    @api.expect(review_update_model)
     @api.response(200, 'Review updated successfully')
     @api.response(404, 'Review not found')
     @api.response(400, 'Invalid input data')
@@ -58,17 +67,15 @@ class ReviewResource(Resource):
         current_user = get_jwt_identity()
         is_admin = get_jwt()['is_admin']
         review_data = api.payload
-        review = facade.get_review(review_id)
-        if not review:
-            return {'error': 'Review not found'}, 404
-        
-        if review.user.id != current_user and not is_admin:
-            return {'error': 'Forbidden'}, 403
         try:
-            updated_review = facade.update_review(review_id, review_data)
-            return updated_review.to_dict(), 200
+            updated_review = facade.update_review(review_id, review_data, None if is_admin else current_user)
+        except PermissionError:
+            return {'error': 'Forbidden'}, 403
         except Exception as e:
             return {'error': str(e).strip("'")}, 400
+        if not updated_review:
+            return {'error': 'Review not found'}, 404
+        return updated_review.to_dict(), 200
 
     @api.response(200, 'Review deleted successfully')
     @api.response(404, 'Review not found')
@@ -80,14 +87,12 @@ class ReviewResource(Resource):
         """Delete a review"""
         current_user = get_jwt_identity()
         is_admin = get_jwt()['is_admin']
-        review = facade.get_review(review_id)
-        if not review:
-            return {'error': 'Review not found'}, 404
-        
-        if review.user.id != current_user and not is_admin:
-            return {'error': 'Forbidden'}, 403
         try:
-            facade.delete_review(review_id)
-            return {'message': 'Review deleted successfully'}, 200
+            deleted = facade.delete_review(review_id, None if is_admin else current_user)
+        except PermissionError:
+            return {'error': 'Forbidden'}, 403
         except Exception as e:
             return {'error': str(e).strip("'")}, 400
+        if not deleted:
+            return {'error': 'Review not found'}, 404
+        return {'message': 'Review deleted successfully'}, 200
@@ -1,6 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.api.v1.pagination import pagination_parser, paginate
 
 api = Namespace('users', description='User operations')
 
@@ -43,11 +44,12 @@ class UserList(Resource):
         except Exception as e:
             return {'error': str(e).strip("'")}, 400
         
+    @api.expect(pagination_parser)
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
     def get(self):
         """Retrieve a list of users"""
-        users = facade.get_users()
-        return [user.to_dict() for user in users], 200
+        return paginate(facade.get_users_page, lambda user: user.to_dict())
     
 @api.route('/<user_id>')
 class UserResource(Resource):
@@ -91,3 +93,25 @@ class UserResource(Resource):
             return user.to_dict(), 200
         except Exception as e:
             return {'error': str(e).strip("'")}, 400
+
+    @api.response(200, 'User deleted successfully')
+    @api.response(404, 'User not found')
+    @api.response(401, 'Unauthorized')
+    @api.response(403, 'Forbidden')
+    @api.doc(security='apikey')
+    @jwt_required()
+    def delete(self, user_id):
+        """Delete a user with their places and reviews"""
+        current_user = get_jwt_identity()
+        admin = get_jwt()['is_admin']
+
+        if current_user != user_id and not admin:
+            return {'error': 'Forbidden'}, 403
+
+        try:
+            deleted = facade.delete_user(user_id)
+        except Exception as e:
+            return {'error': str(e).strip("'")}, 400
+        if not deleted:
+            return {'error': 'User not found'}, 404
+        return {'message': 'User deleted successfully'}, 200
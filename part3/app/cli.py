@@ -0,0 +1,69 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from app.persistence import fulltext, routing, spatial
+from app.persistence.migrations import upgrade
+
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    """Create the missing tables, columns and indexes on the configured database."""
+    try:
+        upgrade(db.engine)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    # Added aggregate columns start at 0 and must be filled from reviews. Rebuilt
+    # on every run: the columns are committed before the indexes are created, so
+    # a run that failed in between left them at 0 and the next one adds nothing.
+    from app.services import facade
+    facade.rebuild_place_ratings()
+    click.echo('Place rating aggregates rebuilt.')
+    click.echo('Database schema is up to date.')
+
+
+@click.command('rebuild-ratings')
+@with_appcontext
+def rebuild_ratings_command():
+    """Recompute review_count and rating_sum of every place from its reviews."""
+    from app.services import facade
+    facade.rebuild_place_ratings()
+    click.echo('Place rating aggregates rebuilt.')
+
+
+@click.command('rebuild-spatial-index')
+@with_appcontext
+def rebuild_spatial_index_command():
+    """Refill the places R*Tree from the places table."""
+    with db.engine.begin() as conn:
+        spatial.install(conn)
+        spatial.rebuild(conn)
+    click.echo('Spatial index rebuilt.')
+
+
+@click.command('rebuild-search-index')
+@click.option('--optimize-only', is_flag=True, help='Only merge the index segments, without reindexing.')
+@with_appcontext
+def rebuild_search_index_command(optimize_only):
+    """Reindex place and review texts for full-text search, then optimize the index."""
+    with db.engine.begin() as conn:
+        fulltext.install(conn)
+        if not optimize_only:
+            fulltext.rebuild(conn)
+        fulltext.optimize(conn)
+    click.echo('Search index optimized.' if optimize_only else 'Search index rebuilt.')
+
+
+@click.command('refresh-replica')
+@with_appcontext
+def refresh_replica_command():
+    """Copy the primary database to READ_REPLICA_PATH with the SQLite backup API."""
+    path = current_app.config.get('READ_REPLICA_PATH')
+    if not path:
+        raise click.UsageError('READ_REPLICA_PATH is not configured.')
+    routing.refresh_replica(db.engine, path)
+    read_engine = routing.read_engine(current_app)
+    if read_engine is not None:
+        read_engine.dispose()
+    click.echo(f'Replica {path} refreshed.')
@@ -1,4 +1,5 @@
 from app import db
+from app.persistence.unit_of_work import commit
 import uuid
 from datetime import datetime
 
@@ -9,11 +10,21 @@ class BaseModel(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
+    @classmethod
+    def check(cls, key, value):
+        """Run the check_<key> static method of the model on value, if it has one.
+
+        The @validates methods call it on assignment, and repositories on the
+        values they write with a bulk UPDATE, without an instance.
+        """
+        check = getattr(cls, f'check_{key}', None)
+        return value if check is None else check(value)
+
     def save(self):
         """Update the updated_at timestamp whenever the object is modified"""
         self.updated_at = datetime.now()
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def update(self, data):
         """Update the attributes of the object based on the provided dictionary"""
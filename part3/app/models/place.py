@@ -7,61 +7,81 @@ class Place(BaseModel):
 
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(500), nullable=True)
-    price = db.Column(db.Float, nullable=False)
-    latitude = db.Column(db.Float, nullable=False)
-    longitude = db.Column(db.Float, nullable=False)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-    amenities = db.relationship('Amenity', secondary='amenities_places', backref='places', lazy='dynamic')
+    price = db.Column(db.Float, nullable=False, index=True)
+    latitude = db.Column(db.Float, nullable=False, index=True)
+    longitude = db.Column(db.Float, nullable=False, index=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    # Denormalized from reviews, kept up to date by HBnBFacade
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Key of the row in the SQLite R*Tree and full-text index, set by a trigger
+    # on insert (app.persistence.index_keys); not mapped
+    index_key = db.Column(db.Integer, unique=True, index=True)
+    __mapper_args__ = {'exclude_properties': ['index_key']}
+    amenities = db.relationship('Amenity', secondary='amenities_places', backref='places', lazy='select')
 
     owner = db.relationship('User', backref='places', lazy='select')
 
-    @validates('title')
-    def validate_title(self, key, value):
+    @staticmethod
+    def check_title(value):
         if not isinstance(value, str):
             raise TypeError("Title must be a string")
         if 10 < len(value) > 100:
             raise ValueError("Title must be between 10 and 100 characters")
         return value
     
-    @validates('description')
-    def validate_description(self, key, value):
+    @staticmethod
+    def check_description(value):
         if not isinstance(value, str):
             raise TypeError("Description must be a string")
         if len(value) > 500:
             raise ValueError("Description must be less than or equal to 500 characters")
         return value
     
-    @validates('price')
-    def validate_price(self, key, value):
+    @staticmethod
+    def check_price(value):
         if not isinstance(value, float) and not isinstance(value, int):
             raise TypeError("Price must be a float")
         if value <= 0:
             raise ValueError("Price must be positive.")
         return value
     
-    @validates('latitude')
-    def validate_latitude(self, key, value):
+    @staticmethod
+    def check_latitude(value):
         if not isinstance(value, float):
             raise TypeError("Latitude must be a float")
         if not -90 <= value <= 90:
             raise ValueError("Latitude must be between -90 and 90.")
         return value
     
-    @validates('longitude')
-    def validate_longitude(self, key, value):
+    @staticmethod
+    def check_longitude(value):
         if not isinstance(value, float):
             raise TypeError("Longitude must be a float")
         if not -180 <= value <= 180:
             raise ValueError("Longitude must be between -180 and 180.")
         return value
 
+    @validates('title', 'description', 'price', 'latitude', 'longitude')
+    def validate(self, key, value):
+        return self.check(key, value)
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
     def add_review(self, review):
         """Add a review to the place."""
-        self.reviews.append(review)
+        # The backref appends it to self.reviews without loading the collection;
+        # the unique (place_id, user_id) index rejects duplicates
+        review.place = self
     
     def delete_review(self, review):
-        """Add an amenity to the place."""
-        self.reviews.remove(review)
+        """Remove a review from the place."""
+        if review in self.reviews:
+            self.reviews.remove(review)
 
     def add_amenity(self, amenity):
         """Add an amenity to the place."""
@@ -75,7 +95,9 @@ class Place(BaseModel):
             'price': self.price,
             'latitude': self.latitude,
             'longitude': self.longitude,
-            'owner_id': self.owner.id
+            'owner_id': self.user_id,
+            'review_count': self.review_count,
+            'average_rating': self.average_rating
         }
     
     def to_dict_list(self):
@@ -87,6 +109,8 @@ class Place(BaseModel):
             'latitude': self.latitude,
             'longitude': self.longitude,
             'owner': self.owner.to_dict(),
+            'review_count': self.review_count,
+            'average_rating': self.average_rating,
             'amenities': [amenity.to_dict() for amenity in self.amenities],
             'reviews': [review.to_dict() for review in self.reviews]
         }
@@ -4,36 +4,46 @@ from sqlalchemy.orm import validates
 
 class Review(BaseModel):
 	__tablename__ = 'reviews'
+	# The unique (place_id, user_id) index also serves lookups by place_id alone
+	__table_args__ = (db.Index('ix_reviews_place_id_user_id', 'place_id', 'user_id', unique=True),)
 
 	text = db.Column(db.String(500), nullable=False)
 	rating = db.Column(db.Integer, nullable=False)
 	place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False)
-	user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+	user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+	# Key of the row in the SQLite full-text index, set by a trigger on insert
+	# (app.persistence.index_keys); not mapped
+	index_key = db.Column(db.Integer, unique=True, index=True)
+	__mapper_args__ = {'exclude_properties': ['index_key']}
 	
-	place = db.relationship('Place', backref=db.backref('reviews', lazy='dynamic'), lazy='select')
+	place = db.relationship('Place', backref=db.backref('reviews', lazy='select'), lazy='select')
 	user = db.relationship('User', backref=db.backref('reviews', lazy='dynamic'), lazy='select')
 
-	@validates('text')
-	def validate_text(self, key, value):
+	@staticmethod
+	def check_text(value):
 		if not isinstance(value, str):
 			raise TypeError("Text must be a string")
 		if 10 < len(value) > 500:
 			raise ValueError("Text must be between 10 and 500 characters")
 		return value
 	
-	@validates('rating')
-	def validate_rating(self, key, value):
+	@staticmethod
+	def check_rating(value):
 		if not isinstance(value, int):
 			raise TypeError("Rating must be an integer")
 		if not 1 <= value <= 5:
 			raise ValueError("Rating must be between 1 and 5.")
 		return value
 
+	@validates('text', 'rating')
+	def validate(self, key, value):
+		return self.check(key, value)
+
 	def to_dict(self):
 		return {
 			'id': self.id,
 			'text': self.text,
 			'rating': self.rating,
-			'place_id': self.place.id,
-			'user_id': self.user.id
+			'place_id': self.place_id,
+			'user_id': self.user_id
 		}
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class LRUCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, maxsize, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        expires = self._clock() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+# Caches by model class, so that any flush touching a cached row drops it,
+# even when the change did not go through the repository.
+_caches = {}
+_PENDING_KEY = 'cache_invalidations'
+
+
+def register(model, cache):
+    if cache is None:
+        _caches.pop(model, None)
+    else:
+        _caches[model] = cache
+
+
+def invalidate(session, cache, key):
+    """Drop `key` now, and again once the session's transaction ends, so a
+    concurrent reader cannot leave the pre-commit row behind"""
+    cache.invalidate(key)
+    session.info.setdefault(_PENDING_KEY, set()).add((cache, key))
+
+
+def invalidate_rows(session, model, keys):
+    """Invalidate rows of `model` changed by set-based statements, which the
+    flush listener below never sees"""
+    cache = _caches.get(model)
+    if cache is not None:
+        for key in keys:
+            invalidate(session, cache, key)
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_flushed(session, flush_context):
+    for obj in chain(session.dirty, session.deleted):
+        cache = _caches.get(type(obj))
+        if cache is not None:
+            invalidate(session, cache, obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_pending(session):
+    for cache, key in session.info.pop(_PENDING_KEY, ()):
+        cache.invalidate(key)
@@ -0,0 +1,118 @@
+"""FTS5 indexes over place titles/descriptions and review texts (SQLite only).
+
+places_fts and reviews_fts are external-content tables: they store only
+the index and read the text back from places and reviews by index_key
+(see index_keys), which VACUUM leaves as it is. Triggers keep them in
+sync with every write on the source tables.
+"""
+import html
+from sqlalchemy import event, text
+from app.models.place import Place
+from app.models.review import Review
+from app.persistence import index_keys
+
+_TABLES = {
+    'places_fts': {
+        'source': 'places',
+        'columns': ['title', 'description'],
+    },
+    'reviews_fts': {
+        'source': 'reviews',
+        'columns': ['text'],
+    },
+}
+
+
+def _statements(name, source, columns):
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    names = ', '.join(columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({names}, content='{source}', content_rowid='index_key', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        # A row is indexed once the insert trigger of index_keys has given it its key
+        f'''CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER UPDATE OF index_key ON {source} WHEN old.index_key IS NULL BEGIN
+            INSERT INTO {name}(rowid, {names}) VALUES (new.index_key, {new});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {names} ON {source} BEGIN
+            INSERT INTO {name}({name}, rowid, {names}) VALUES ('delete', old.index_key, {old});
+            INSERT INTO {name}(rowid, {names}) VALUES (new.index_key, {new});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {source} BEGIN
+            INSERT INTO {name}({name}, rowid, {names}) VALUES ('delete', old.index_key, {old});
+        END''',
+    ]
+
+
+def _install_table(connection, name):
+    """Create one FTS5 table and its triggers if missing; returns whether it was
+    created, or keyed on rowid before and was recreated"""
+    definition = connection.execute(text('SELECT sql FROM sqlite_master WHERE name = :name'), {'name': name}).scalar()
+    stale = definition is not None and "content_rowid='index_key'" not in definition
+    if stale:
+        connection.execute(text(f'DROP TABLE {name}'))
+        for trigger in ('insert', 'update', 'delete'):
+            connection.execute(text(f'DROP TRIGGER IF EXISTS {name}_{trigger}'))
+    index_keys.install(connection, _TABLES[name]['source'])
+    for statement in _statements(name, **_TABLES[name]):
+        connection.execute(text(statement))
+    return definition is None or stale
+
+
+def install(connection):
+    """Create the FTS5 tables and their triggers if missing; returns whether one
+    was created and must be filled with rebuild()"""
+    if connection.dialect.name != 'sqlite':
+        return False
+    created = [_install_table(connection, name) for name in _TABLES]
+    return any(created)
+
+
+def rebuild(connection):
+    """Reindex every row of places and reviews"""
+    for name in _TABLES:
+        connection.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+
+
+def optimize(connection):
+    """Merge the index segments, worth running after a large reindex"""
+    for name in _TABLES:
+        connection.execute(text(f"INSERT INTO {name}({name}) VALUES ('optimize')"))
+
+
+def match_query(q):
+    """Turn free text into an FTS5 query: every word must appear, the last one as a prefix.
+
+    Words are quoted so that FTS5 operators and punctuation typed by users
+    are searched literally instead of raising a syntax error.
+    """
+    words = [word.replace('"', '""') for word in q.split()]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+# Delimiters snippet() puts around matches: control characters, which
+# html.escape leaves alone and no text typed by users is expected to hold
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+def snippet_html(snippet):
+    """HTML of a snippet() built with MARK_START/MARK_END: the text escaped, the matches in <mark>"""
+    return html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def _listen(model, name):
+    @event.listens_for(model.__table__, 'after_create')
+    def create(table, connection, **kw):
+        if connection.dialect.name == 'sqlite':
+            _install_table(connection, name)
+
+    @event.listens_for(model.__table__, 'before_drop')
+    def drop(table, connection, **kw):
+        if connection.dialect.name == 'sqlite':
+            connection.execute(text(f'DROP TABLE IF EXISTS {name}'))
+
+
+_listen(Place, 'places_fts')
+_listen(Review, 'reviews_fts')
@@ -0,0 +1,44 @@
+"""Stable integer keys of places and reviews for the SQLite virtual tables.
+
+The R*Tree and the full-text indexes refer to rows by an integer. The
+implicit rowid will not do: places and reviews have string primary keys,
+so VACUUM may renumber their rowids. Instead, a trigger gives each new row
+an index_key, one more than the largest so far, and nothing changes it
+afterwards. The triggers of the virtual tables fire when it is set.
+"""
+from sqlalchemy import event, text
+from app.models.place import Place
+from app.models.review import Review
+
+TABLES = ('places', 'reviews')
+
+
+def _statement(table):
+    return f'''CREATE TRIGGER IF NOT EXISTS {table}_index_key AFTER INSERT ON {table} WHEN new.index_key IS NULL BEGIN
+        UPDATE {table} SET index_key = (SELECT COALESCE(MAX(index_key), 0) + 1 FROM {table}) WHERE rowid = new.rowid;
+    END'''
+
+
+def install(connection, table):
+    """Create the trigger setting index_key on insert into `table` if missing"""
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(_statement(table)))
+
+
+def backfill(connection):
+    """Give an index_key to the rows written before the column existed"""
+    for table in TABLES:
+        connection.execute(text(
+            f'UPDATE {table} SET index_key = (SELECT COALESCE(MAX(index_key), 0) FROM {table}) + rowid '
+            'WHERE index_key IS NULL'
+        ))
+
+
+def _listen(model, table):
+    @event.listens_for(model.__table__, 'after_create')
+    def create(target, connection, **kw):
+        install(connection, table)
+
+
+_listen(Place, 'places')
+_listen(Review, 'reviews')
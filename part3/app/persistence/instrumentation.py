@@ -0,0 +1,136 @@
+"""Statement counting, timing and slow-query logging on the SQLAlchemy engine.
+
+Every statement run through the engine is reported to the recorders that
+are active in the current context: one per HTTP request (see install()),
+plus any opened with recording() or assert_max_queries().
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_recorders = ContextVar('query_recorders', default=())
+
+# Slow-query logs never show the values sent to these tables (emails, password hashes)
+_PRIVATE_TABLES = re.compile(r'\busers\b', re.IGNORECASE)
+_MAX_PARAMETERS_LENGTH = 500
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.statements = []
+        self.duration = 0.0
+        self.slow = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def record(self, statement, parameters, duration):
+        self.statements.append((statement, parameters))
+        self.duration += duration
+
+
+def start():
+    recorder = QueryRecorder()
+    return recorder, _recorders.set(_recorders.get() + (recorder,))
+
+
+def stop(token):
+    _recorders.reset(token)
+
+
+@contextmanager
+def recording():
+    """Record the statements run inside the block"""
+    recorder, token = start()
+    try:
+        yield recorder
+    finally:
+        stop(token)
+
+
+@contextmanager
+def assert_max_queries(n):
+    """Fail if the block runs more than n statements, listing the ones it ran"""
+    with recording() as recorder:
+        yield recorder
+    if recorder.count > n:
+        listing = '\n'.join(f'{i}. {statement}' for i, (statement, _) in enumerate(recorder.statements, 1))
+        raise AssertionError(f'{recorder.count} queries executed, {n} expected at most:\n{listing}')
+
+
+def _explain(connection, statement, parameters):
+    if connection.dialect.name != 'sqlite':
+        return None
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        rows = cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    except Exception:
+        return None
+    finally:
+        cursor.close()
+    return '\n'.join(row[-1] for row in rows)
+
+
+def _loggable_parameters(statement, parameters, executemany):
+    if executemany:
+        return f'({len(parameters)} rows, not logged)'
+    if _PRIVATE_TABLES.search(statement):
+        return '(not logged)'
+    listed = repr(parameters)
+    if len(listed) > _MAX_PARAMETERS_LENGTH:
+        return f'{listed[:_MAX_PARAMETERS_LENGTH]}... ({len(listed)} characters)'
+    return listed
+
+
+def watch(engine, slow_query_ms=None):
+    """Report the statements of `engine` to the active recorders, and log those
+    slower than slow_query_ms (None disables the log) with their query plan"""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['query_start'].pop()
+        recorders = _recorders.get()
+        for recorder in recorders:
+            recorder.record(statement, parameters, duration)
+        if slow_query_ms is None or duration * 1000 < slow_query_ms:
+            return
+        plan = None if executemany else _explain(conn, statement, parameters)
+        logger.warning('Slow query (%.1f ms): %s\nParameters: %s\nQuery plan:\n%s',
+                       duration * 1000, statement, _loggable_parameters(statement, parameters, executemany),
+                       plan or '(not available)')
+        for recorder in recorders:
+            recorder.slow.append((statement, duration, plan))
+
+
+def install(app, engine):
+    """Record the statements of each request; in debug mode, report the totals
+    in the X-DB-Query-Count and X-DB-Time-Ms response headers"""
+    watch(engine, app.config.get('SLOW_QUERY_MS'))
+
+    @app.before_request
+    def start_recording():
+        g.query_recorder, g.query_recorder_token = start()
+
+    @app.after_request
+    def add_headers(response):
+        recorder = g.get('query_recorder')
+        if recorder is not None and app.debug:
+            response.headers['X-DB-Query-Count'] = str(recorder.count)
+            response.headers['X-DB-Time-Ms'] = f'{recorder.duration * 1000:.2f}'
+        return response
+
+    @app.teardown_request
+    def stop_recording(exc):
+        token = g.pop('query_recorder_token', None)
+        if token is not None:
+            stop(token)
@@ -0,0 +1,72 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from app import db
+from app.persistence import fulltext, index_keys, spatial
+
+
+def upgrade(engine):
+    """Bring an existing database up to the current models.
+
+    Creates missing tables, adds columns that were declared after the table
+    was created, then any index declared on the models that the database does
+    not have yet, and the places R*Tree and full-text indexes (filled from the
+    existing rows, and refilled if they were still keyed on rowid).
+    Running it again is a no-op.
+
+    Raises ValueError, before changing anything, when existing rows break a
+    unique index still to be created, e.g. two reviews of a place by the
+    same user written before the index existed.
+
+    Returns the list of ``(table, column)`` names that were added.
+    """
+    _check_unique_indexes(engine)
+    db.metadata.create_all(engine)
+    added = []
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                added.append((table.name, column.name))
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        installed = [virtual_tables.install(conn) for virtual_tables in (spatial, fulltext)]
+        # After the installs, which replace triggers left behind on places
+        if engine.dialect.name == 'sqlite':
+            index_keys.backfill(conn)
+        for virtual_tables, rebuild in zip((spatial, fulltext), installed):
+            if rebuild:
+                virtual_tables.rebuild(conn)
+    return added
+
+
+def _check_unique_indexes(engine):
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    problems = []
+    with engine.connect() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for index in table.indexes:
+                names = [column.name for column in index.columns]
+                if not index.unique or index.name in existing or not columns.issuperset(names):
+                    continue
+                listed = ', '.join(names)
+                rows = conn.execute(text(f'SELECT {listed}, COUNT(*) FROM {table.name} '
+                                         f'GROUP BY {listed} HAVING COUNT(*) > 1')).all()
+                if rows:
+                    problems.append(f'{index.name} cannot be created, duplicates in {table.name}:')
+                    for *values, count in rows:
+                        pairs = ', '.join(f'{name}={value}' for name, value in zip(names, values))
+                        problems.append(f'  {pairs}: {count} rows')
+    if problems:
+        raise ValueError('\n'.join(problems + ['Remove the duplicates, then run the upgrade again.']))
@@ -1,7 +1,243 @@
+from app.models.amenities_places import AmenityPlace
 from app.models.place import Place
+from app.models.review import Review
 from app import db
-from app.persistence.repository import SQLAlchemyRepository
+import heapq
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.util import identity_key
+from app.persistence import cache as second_level_cache
+from app.persistence import fulltext, spatial
+from app.persistence.repository import InMemoryRepository, SQLAlchemyRepository
+from app.persistence.unit_of_work import commit
 
 class PlaceRepository(SQLAlchemyRepository):
+    owner_column = 'user_id'
+    updatable = ('title', 'description', 'price', 'latitude', 'longitude')
+    derived = ('review_count', 'rating_sum', 'index_key')
+
     def __init__(self):
         super().__init__(Place)
+
+    def _with_details(self, query):
+        """Eager-load everything Place.to_dict_list() touches, one SELECT per relationship"""
+        return query.options(
+            selectinload(Place.owner),
+            selectinload(Place.amenities),
+            selectinload(Place.reviews)
+        )
+
+    def get_all_with_details(self):
+        return self._with_details(self.model.query).all()
+
+    def get_page_with_details(self, limit, after=None):
+        return self._paginate(self._with_details(self.model.query), limit, after)
+
+    def search(self, limit, after=None, min_price=None, max_price=None, amenity_ids=(), owner_id=None):
+        """One page of the places matching every given filter.
+
+        Each filter maps to an indexed column: price, user_id, and
+        amenities_places.amenity_id for places offering all the amenities.
+        """
+        query = self.model.query
+        if min_price is not None:
+            query = query.filter(Place.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Place.price <= max_price)
+        if owner_id is not None:
+            query = query.filter(Place.user_id == owner_id)
+        amenity_ids = list(dict.fromkeys(amenity_ids))
+        if amenity_ids:
+            with_all = (
+                select(AmenityPlace.place_id)
+                .where(AmenityPlace.amenity_id.in_(amenity_ids))
+                .group_by(AmenityPlace.place_id)
+                .having(func.count() == len(amenity_ids))
+            )
+            query = query.filter(Place.id.in_(with_all))
+        return self._paginate(self._with_details(query), limit, after)
+
+    def nearby(self, lat, lon, radius_km, limit):
+        """The `limit` closest places within radius_km, as (place, distance_km) pairs.
+
+        The R*Tree returns the places inside the bounding box of the circle;
+        only their coordinates are read to compute the exact haversine
+        distance, then the places kept are loaded by id.
+        """
+        min_lat, max_lat, lon_ranges = spatial.bounding_box(lat, lon, radius_km)
+        box = [f'(r.max_lon >= :min_lon_{i} AND r.min_lon <= :max_lon_{i})' for i in range(len(lon_ranges))]
+        params = {'min_lat': min_lat, 'max_lat': max_lat}
+        for i, (min_lon, max_lon) in enumerate(lon_ranges):
+            params.update({f'min_lon_{i}': min_lon, f'max_lon_{i}': max_lon})
+        rows = db.session.execute(text(
+            'SELECT p.id, p.latitude, p.longitude FROM places_rtree AS r JOIN places AS p ON p.index_key = r.id '
+            f'WHERE r.max_lat >= :min_lat AND r.min_lat <= :max_lat AND ({" OR ".join(box)})'
+        ), params)
+        distances = ((spatial.haversine_km(lat, lon, row.latitude, row.longitude), row.id) for row in rows)
+        closest = heapq.nsmallest(limit, (d for d in distances if d[0] <= radius_km))
+        places = {place.id: place for place in self.get_many([place_id for _, place_id in closest])}
+        return [(places[place_id], distance) for distance, place_id in closest if place_id in places]
+
+    def search_text(self, q, limit, after=None):
+        """One page of (place, snippet) pairs for the places matching q, best first.
+
+        A place matches through its title or description, or through the text
+        of one of its reviews; review matches weigh half as much. Pages are
+        keyset-paginated on (score, id), `after` being the key returned with
+        the previous page. Snippets are HTML: the text is escaped and the
+        matched words are wrapped in <mark>.
+        """
+        match = fulltext.match_query(q)
+        if match is None:
+            return [], None
+        after_score, after_id = None, None
+        if after is not None:
+            try:
+                score, after_id = after.split(' ', 1)
+                after_score = float(score)
+            except ValueError:
+                raise ValueError('Invalid cursor')
+        rows = db.session.execute(text('''
+            WITH hits AS (
+                SELECT p.id AS place_id, bm25(places_fts, 10.0, 1.0) AS score,
+                       snippet(places_fts, -1, :mark_start, :mark_end, '…', 12) AS snippet
+                FROM places_fts JOIN places AS p ON p.index_key = places_fts.rowid
+                WHERE places_fts MATCH :match
+                UNION ALL
+                SELECT r.place_id, bm25(reviews_fts) / 2, snippet(reviews_fts, 0, :mark_start, :mark_end, '…', 12)
+                FROM reviews_fts JOIN reviews AS r ON r.index_key = reviews_fts.rowid
+                WHERE reviews_fts MATCH :match
+            ),
+            best AS (
+                SELECT place_id, MIN(score) AS score, snippet FROM hits GROUP BY place_id
+            )
+            SELECT place_id, score, snippet FROM best
+            WHERE :after_score IS NULL OR score > :after_score OR (score = :after_score AND place_id > :after_id)
+            ORDER BY score, place_id
+            LIMIT :limit
+        '''), {'match': match, 'after_score': after_score, 'after_id': after_id, 'limit': limit + 1,
+              'mark_start': fulltext.MARK_START, 'mark_end': fulltext.MARK_END}).all()
+        next_key = f'{rows[limit - 1].score!r} {rows[limit - 1].place_id}' if len(rows) > limit else None
+        rows = rows[:limit]
+        places = {place.id: place for place in self.get_many([row.place_id for row in rows])}
+        return [(places[row.place_id], fulltext.snippet_html(row.snippet)) for row in rows if row.place_id in places], next_key
+
+    def add_amenities(self, place_id, amenity_ids):
+        """Link amenities to a place with one INSERT, skipping the links that already exist"""
+        rows = [{'place_id': place_id, 'amenity_id': amenity_id} for amenity_id in dict.fromkeys(amenity_ids)]
+        if not rows:
+            return
+        db.session.execute(insert(AmenityPlace.__table__).values(rows).on_conflict_do_nothing())
+        place = db.session.identity_map.get(identity_key(Place, place_id))
+        if place is not None:
+            db.session.expire(place, ['amenities'])
+        commit()
+
+    def adjust_rating(self, place_id, count_delta, rating_delta):
+        """Apply a review insert/update/delete to the place's review_count and rating_sum"""
+        db.session.execute(
+            update(Place)
+            .where(Place.id == place_id)
+            .values(review_count=Place.review_count + count_delta, rating_sum=Place.rating_sum + rating_delta)
+        )
+        self._invalidate(place_id)
+        commit()
+
+    def delete_owned(self, obj_id, owner_id=None):
+        """Delete a place with its amenity links and reviews, one DELETE per table"""
+        self._delete_children(select(Place.id).where(*self._owned(obj_id, owner_id)))
+        return super().delete_owned(obj_id, owner_id)
+
+    def delete_by_owner(self, user_id):
+        """Delete every place of a user with their amenity links and reviews; returns how many places"""
+        self._delete_children(select(Place.id).where(Place.user_id == user_id))
+        place_ids = db.session.execute(delete(Place).where(Place.user_id == user_id).returning(Place.id)).scalars().all()
+        second_level_cache.invalidate_rows(db.session, Place, place_ids)
+        commit()
+        return len(place_ids)
+
+    def _delete_children(self, place_ids):
+        db.session.execute(delete(AmenityPlace).where(AmenityPlace.place_id.in_(place_ids)))
+        review_ids = db.session.execute(delete(Review).where(Review.place_id.in_(place_ids)).returning(Review.id)).scalars().all()
+        second_level_cache.invalidate_rows(db.session, Review, review_ids)
+
+    def discount_reviews_by(self, user_id):
+        """Take the reviews written by user_id out of the aggregates of the places they rate"""
+        places = Place.__table__
+        totals = (
+            select(Review.place_id, func.count().label('review_count'), func.sum(Review.rating).label('rating_sum'))
+            .where(Review.user_id == user_id)
+            .group_by(Review.place_id)
+            .subquery()
+        )
+        place_ids = db.session.execute(
+            update(places)
+            .where(places.c.id == totals.c.place_id)
+            .values(review_count=places.c.review_count - totals.c.review_count,
+                    rating_sum=places.c.rating_sum - totals.c.rating_sum)
+            .returning(places.c.id)
+        ).scalars().all()
+        for place_id in place_ids:
+            place = db.session.identity_map.get(identity_key(Place, place_id))
+            if place is not None:
+                db.session.expire(place, ['review_count', 'rating_sum'])
+        second_level_cache.invalidate_rows(db.session, Place, place_ids)
+        commit()
+
+    def rerate_review(self, review_id, rating, owner_id=None):
+        """Replace a review's old rating by `rating` in its place's rating_sum.
+
+        Runs before the review itself is updated, while the old rating can
+        still be read; matches nothing if the review is not owner_id's.
+        """
+        reviews = Review.__table__
+        criteria = [reviews.c.id == review_id, reviews.c.place_id == Place.id]
+        if owner_id is not None:
+            criteria.append(reviews.c.user_id == owner_id)
+        result = db.session.execute(
+            update(Place)
+            .where(*criteria)
+            .values(rating_sum=Place.rating_sum + rating - reviews.c.rating)
+            .returning(Place.id)
+        )
+        for place_id in result.scalars():
+            self._invalidate(place_id)
+        commit()
+
+    def rebuild_ratings(self):
+        """Recompute review_count and rating_sum of every place from the reviews table"""
+        places = Place.__table__
+        totals = (
+            select(Review.place_id, func.count().label('review_count'), func.sum(Review.rating).label('rating_sum'))
+            .group_by(Review.place_id)
+            .subquery()
+        )
+        db.session.execute(
+            update(places)
+            .where((places.c.review_count != 0) | (places.c.rating_sum != 0))
+            .values(review_count=0, rating_sum=0)
+        )
+        db.session.execute(
+            update(places)
+            .where(places.c.id == totals.c.place_id)
+            .values(review_count=totals.c.review_count, rating_sum=totals.c.rating_sum)
+        )
+        db.session.expire_all()
+        if self.cache is not None:
+            self.cache.clear()
+        commit()
+
+
+class InMemoryPlaceRepository(InMemoryRepository):
+    def search(self, limit, after=None, min_price=None, max_price=None, amenity_ids=(), owner_id=None):
+        amenity_ids = set(amenity_ids)
+
+        def matches(place):
+            owner = place.owner.id if place.owner is not None else place.user_id
+            return ((min_price is None or place.price >= min_price)
+                    and (max_price is None or place.price <= max_price)
+                    and (owner_id is None or owner == owner_id)
+                    and amenity_ids <= {amenity.id for amenity in place.amenities})
+
+        return self._paginate(filter(matches, self._storage.values()), limit, after)
@@ -1,5 +1,13 @@
 from abc import ABC, abstractmethod
+from itertools import islice
+from sqlalchemy import Float, delete, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import MANYTOONE, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 from app import db
+from app.persistence import cache as second_level_cache
+from app.persistence.unit_of_work import commit, in_transaction, transaction
 
 class Repository(ABC):
     @abstractmethod
@@ -10,6 +18,10 @@ class Repository(ABC):
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
@@ -26,6 +38,22 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def get_page(self, limit, after=None):
+        pass
+
+    @abstractmethod
+    def iter_all(self, batch_size=1000):
+        pass
+
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
+    @abstractmethod
+    def upsert_many(self, objs):
+        pass
+
 
 class InMemoryRepository(Repository):
     def __init__(self):
@@ -37,6 +65,9 @@ class InMemoryRepository(Repository):
     def get(self, obj_id):
         return self._storage.get(obj_id)
 
+    def get_many(self, obj_ids):
+        return [self._storage[obj_id] for obj_id in dict.fromkeys(obj_ids) if obj_id in self._storage]
+
     def get_all(self):
         return list(self._storage.values())
 
@@ -52,17 +83,79 @@ class InMemoryRepository(Repository):
 
     def get_by_attribute(self, attr_name, attr_value):
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
-    
+
+    def get_page(self, limit, after=None):
+        return self._paginate(self._storage.values(), limit, after)
+
+    def iter_all(self, batch_size=1000):
+        # Iterate over a snapshot of the keys so that the storage can change meanwhile
+        for obj_id in list(self._storage):
+            obj = self._storage.get(obj_id)
+            if obj is not None:
+                yield obj
+
+    def _paginate(self, objs, limit, after=None):
+        objs = sorted((obj for obj in objs if after is None or obj.id > after), key=lambda obj: obj.id)
+        next_key = objs[limit - 1].id if len(objs) > limit else None
+        return objs[:limit], next_key
+
+    def add_many(self, objs):
+        objs = list(objs)
+        for obj in objs:
+            if obj.id in self._storage:
+                raise ValueError(f"Duplicate id {obj.id}")
+        self._storage.update((obj.id, obj) for obj in objs)
+        return objs
+
+    def upsert_many(self, objs):
+        objs = list(objs)
+        self._storage.update((obj.id, obj) for obj in objs)
+        return objs
+
 class SQLAlchemyRepository(Repository):
+    # Column holding the id of the user a row belongs to (update_owned/delete_owned)
+    owner_column = None
+    # Columns update_owned may change; it rejects payloads with other keys
+    updatable = ()
+    # Columns computed from other tables or by the database, which upsert_many
+    # leaves as they are on existing rows
+    derived = ()
+    # Whether configure_cache may put a second-level cache in front of this repository
+    cacheable = True
+
     def __init__(self, model):
         self.model = model
+        self.cache = None
+
+    def configure_cache(self, maxsize, ttl=None):
+        """Put a bounded read-through cache in front of get/get_by_attribute (maxsize=0 disables it)"""
+        self.cache = second_level_cache.LRUCache(maxsize, ttl) if maxsize and self.cacheable else None
+        second_level_cache.register(self.model, self.cache)
 
     def add(self, obj):
         db.session.add(obj)
-        db.session.commit()
+        commit()
+        self._invalidate(obj.id)
 
     def get(self, obj_id):
-        return self.model.query.get(obj_id)
+        if self.cache is None:
+            return self.model.query.get(obj_id)
+        obj = db.session.identity_map.get(identity_key(self.model, obj_id))
+        if obj is not None:
+            return obj
+        snapshot = self.cache.get(obj_id)
+        if snapshot is not None:
+            return self._from_snapshot(snapshot)
+        obj = self.model.query.get(obj_id)
+        self._remember(obj)
+        return obj
+
+    def get_many(self, obj_ids):
+        """Fetch several rows by id with a single IN query; unknown ids are skipped"""
+        obj_ids = list(dict.fromkeys(obj_ids))
+        if not obj_ids:
+            return []
+        return self.model.query.filter(self.model.id.in_(obj_ids)).all()
 
     def get_all(self):
         return self.model.query.all()
@@ -72,14 +165,193 @@ class SQLAlchemyRepository(Repository):
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            commit()
+            self._invalidate(obj_id)
         return obj
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            commit()
+            self._invalidate(obj_id)
+
+    def update_owned(self, obj_id, data, owner_id=None):
+        """Update a row with a single UPDATE ... WHERE id = ? AND <owner_column> = ? RETURNING.
+
+        The model checks run on the new values first, and keys outside
+        `updatable` raise ValueError. owner_id=None skips
+        the ownership check (admins). Returns the updated object, or None if
+        there is no such id; raises PermissionError if the row belongs to
+        another user.
+        """
+        values = self._validated(data)
+        statement = update(self.model).where(*self._owned(obj_id, owner_id)).values(**values).returning(self.model)
+        obj = db.session.execute(statement, execution_options={'populate_existing': True}).scalars().first()
+        if obj is None:
+            self._check_forbidden(obj_id)
+            return None
+        # SQLite's RETURNING hands back integral REAL values as ints (10 instead of 10.0)
+        for column in self.model.__table__.columns:
+            value = getattr(obj, column.key)
+            if isinstance(column.type, Float) and isinstance(value, int):
+                set_committed_value(obj, column.key, float(value))
+        self._invalidate(obj_id)
+        commit()
+        return obj
+
+    def delete_owned(self, obj_id, owner_id=None):
+        """Delete a row with a single DELETE ... WHERE id = ? AND <owner_column> = ? RETURNING.
+
+        Returns the deleted row, or None if there is no such id; raises
+        PermissionError if the row belongs to another user.
+        """
+        statement = delete(self.model).where(*self._owned(obj_id, owner_id)).returning(*self.model.__table__.columns)
+        row = db.session.execute(statement).first()
+        if row is None:
+            self._check_forbidden(obj_id)
+            return None
+        self._invalidate(obj_id)
+        commit()
+        return row
+
+    def _owned(self, obj_id, owner_id):
+        criteria = [self.model.id == obj_id]
+        if owner_id is not None:
+            criteria.append(getattr(self.model, self.owner_column) == owner_id)
+        return criteria
+
+    def _check_forbidden(self, obj_id):
+        """After a guarded write matched nothing: the row exists, so it is not ours"""
+        if db.session.execute(select(self.model.id).where(self.model.id == obj_id)).first() is not None:
+            raise PermissionError('Forbidden')
+
+    def _validated(self, data):
+        """The values of data passed through the model's checks; ValueError if
+        data has keys that are not updatable"""
+        rejected = sorted(set(data) - set(self.updatable))
+        if rejected:
+            raise ValueError(f"Cannot update {', '.join(rejected)}")
+        return {key: self.model.check(key, value) for key, value in data.items()}
 
     def get_by_attribute(self, attr_name, attr_value):
-        return self.model.query.filter_by(**{attr_name: attr_value}).first()
+        if self.cache is None:
+            return self.model.query.filter_by(**{attr_name: attr_value}).first()
+        obj_id = self.cache.get((attr_name, attr_value))
+        snapshot = self.cache.get(obj_id) if obj_id is not None else None
+        # The row may have changed since the lookup was cached
+        if snapshot is not None and snapshot.get(attr_name) == attr_value:
+            return self._from_snapshot(snapshot)
+        obj = self.model.query.filter_by(**{attr_name: attr_value}).first()
+        if self._remember(obj):
+            self.cache.set((attr_name, attr_value), obj.id)
+        return obj
+
+    def get_page(self, limit, after=None):
+        """Return up to `limit` objects ordered by id, starting after the id `after`,
+        and the key to resume from (None on the last page)"""
+        return self._paginate(self.model.query, limit, after)
+
+    def iter_all(self, batch_size=1000):
+        """Yield every object, fetching `batch_size` rows at a time"""
+        return self.iter_query(select(self.model), batch_size)
+
+    def iter_query(self, statement, batch_size=1000):
+        """Stream the objects of a select() in batches of batch_size.
+
+        Only the current batch is held in memory: the session keeps weak
+        references to unmodified objects, so objects the caller drops are freed.
+        """
+        result = db.session.execute(statement, execution_options={'yield_per': batch_size})
+        yield from result.scalars()
+
+    def _paginate(self, query, limit, after=None):
+        query = query.order_by(self.model.id)
+        if after is not None:
+            query = query.filter(self.model.id > after)
+        items = query.limit(limit + 1).all()
+        if len(items) > limit:
+            return items[:limit], items[limit - 1].id
+        return items, None
+
+    def add_many(self, objs, batch_size=1000):
+        """Insert many rows with one executemany per batch, in a single transaction.
+
+        Accepts model instances or dicts of constructor arguments; either way
+        the model validators run before anything is sent. The instances get
+        their ids and defaults filled in but are not attached to the session.
+        """
+        return self._write_many(insert(self.model.__table__), objs, batch_size)
+
+    def upsert_many(self, objs, batch_size=1000):
+        """Like add_many, but rows whose id already exists are overwritten,
+        except for their created_at and `derived` columns"""
+        kept = ('id', 'created_at', *self.derived)
+        stmt = sqlite_insert(self.model.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.__table__.c.id],
+            set_={column.name: stmt.excluded[column.name] for column in self.model.__table__.columns if column.name not in kept}
+        )
+        return self._write_many(stmt, objs, batch_size)
+
+    def _invalidate(self, obj_id):
+        if self.cache is not None:
+            second_level_cache.invalidate(db.session, self.cache, obj_id)
+
+    def _remember(self, obj):
+        """Cache a plain-dict snapshot of a clean, committed row"""
+        if obj is None or in_transaction() or db.session.new or db.session.dirty or db.session.deleted:
+            return False
+        self.cache.set(obj.id, {attr.key: getattr(obj, attr.key) for attr in self.model.__mapper__.column_attrs})
+        return True
+
+    def _from_snapshot(self, snapshot):
+        """Rebuild a persistent instance in the current session without a SELECT"""
+        obj = db.session.identity_map.get(identity_key(self.model, snapshot['id']))
+        if obj is not None:
+            return obj
+        obj = self.model.__mapper__.class_manager.new_instance()
+        for key, value in snapshot.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        db.session.add(obj)
+        return obj
+
+    def _write_many(self, stmt, objs, batch_size):
+        objs = iter(objs)
+        written = []
+        with transaction(), db.session.no_autoflush:
+            while True:
+                batch = [obj if isinstance(obj, self.model) else self.model(**obj) for obj in islice(objs, batch_size)]
+                if not batch:
+                    break
+                related = set()
+                db.session.execute(stmt, [self._row(obj, related) for obj in batch])
+                for obj in batch:
+                    self._invalidate(obj.id)
+                # Drop the backref appends recorded on already persistent parents
+                # (e.g. owner.places): the rows are written, nothing to cascade.
+                for parent, key in related:
+                    db.session.expire(parent, [key])
+                written.extend(batch)
+        return written
+
+    def _row(self, obj, related):
+        """Column values of a transient instance, with defaults and foreign keys resolved"""
+        state = obj.__dict__
+        row = {}
+        for column in self.model.__table__.columns:
+            value = state.get(column.key)
+            if value is None and column.default is not None:
+                value = column.default.arg(None) if column.default.is_callable else column.default.arg
+                setattr(obj, column.key, value)
+            row[column.key] = value
+        for relationship in self.model.__mapper__.relationships:
+            parent = state.get(relationship.key)
+            if relationship.direction is MANYTOONE and parent is not None:
+                for local, remote in relationship.local_remote_pairs:
+                    row[local.key] = getattr(parent, remote.key)
+                if parent in db.session:
+                    for reverse in relationship._reverse_property:
+                        related.add((parent, reverse.key))
+        return row
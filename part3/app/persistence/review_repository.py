@@ -1,7 +1,98 @@
+from itertools import islice
+from app.models.place import Place
 from app.models.review import Review
 from app import db
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from app.persistence import cache as second_level_cache
 from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.unit_of_work import commit, transaction
 
 class ReviewRepository(SQLAlchemyRepository):
+    owner_column = 'user_id'
+    updatable = ('text', 'rating')
+    derived = ('index_key',)
+
     def __init__(self):
         super().__init__(Review)
+
+    def add_unless_reviewed(self, review):
+        """Insert a review with INSERT ... ON CONFLICT (place_id, user_id) DO NOTHING.
+
+        Returns False, writing nothing, when its author already reviewed the
+        place; otherwise the review becomes a persistent instance.
+        """
+        related = set()
+        with db.session.no_autoflush:
+            row = self._row(review, related)
+        statement = (
+            insert(Review.__table__).values(row)
+            .on_conflict_do_nothing(index_elements=['place_id', 'user_id'])
+            .returning(Review.__table__.c.id)
+        )
+        if db.session.execute(statement).first() is None:
+            return False
+        for parent, key in related:
+            db.session.expire(parent, [key])
+        make_transient_to_detached(review)
+        db.session.add(review)
+        self._invalidate(review.id)
+        commit()
+        return True
+
+    def add_many(self, objs, batch_size=1000):
+        """Like SQLAlchemyRepository.add_many, counting the reviews in the
+        review_count and rating_sum of their places in the same transaction"""
+        with transaction():
+            reviews = super().add_many(objs, batch_size)
+            self._recount_places({self._place_id(review) for review in reviews})
+        return reviews
+
+    def upsert_many(self, objs, batch_size=1000):
+        """Like SQLAlchemyRepository.upsert_many, recounting the aggregates of
+        the places the reviews belong to, before and after the write"""
+        objs = [obj if isinstance(obj, Review) else Review(**obj) for obj in objs]
+        with transaction():
+            place_ids = set()
+            ids = iter([obj.id for obj in objs if obj.id is not None])
+            while batch := list(islice(ids, batch_size)):
+                place_ids.update(db.session.execute(select(Review.place_id).where(Review.id.in_(batch))).scalars())
+            reviews = super().upsert_many(objs, batch_size)
+            self._recount_places(place_ids | {self._place_id(review) for review in reviews})
+        return reviews
+
+    @staticmethod
+    def _place_id(review):
+        return review.place.id if review.place is not None else review.place_id
+
+    def _recount_places(self, place_ids, batch_size=500):
+        """Recompute review_count and rating_sum of the given places, one UPDATE per batch"""
+        places = Place.__table__
+        reviews = Review.__table__
+        of_place = reviews.c.place_id == places.c.id
+        place_ids = iter(place_ids)
+        while batch := list(islice(place_ids, batch_size)):
+            db.session.execute(
+                update(places)
+                .where(places.c.id.in_(batch))
+                .values(review_count=select(func.count()).where(of_place).scalar_subquery(),
+                        rating_sum=select(func.coalesce(func.sum(reviews.c.rating), 0)).where(of_place).scalar_subquery())
+            )
+            for place_id in batch:
+                place = db.session.identity_map.get(identity_key(Place, place_id))
+                if place is not None:
+                    db.session.expire(place, ['review_count', 'rating_sum'])
+            second_level_cache.invalidate_rows(db.session, Place, batch)
+        commit()
+
+    def delete_by_user(self, user_id):
+        """Delete every review written by a user with one DELETE; returns how many"""
+        review_ids = db.session.execute(delete(Review).where(Review.user_id == user_id).returning(Review.id)).scalars().all()
+        second_level_cache.invalidate_rows(db.session, Review, review_ids)
+        commit()
+        return len(review_ids)
+
+    def get_page_by_place(self, place_id, limit, after=None):
+        return self._paginate(self.model.query.filter_by(place_id=place_id), limit, after)
@@ -0,0 +1,102 @@
+"""Send reads to a read-only engine, writes to the primary.
+
+When a read engine is installed (READ_DATABASE_URI), a session routes
+each SELECT to it as long as the session has not written anything. Once
+it has, or when it runs inside a unit of work, or after pin_primary(),
+everything goes to the primary so that the request reads its own writes.
+Requests other than GET/HEAD/OPTIONS are pinned from the start, so their
+validation reads see the same data as their writes.
+"""
+import os
+import sqlite3
+import tempfile
+from flask import current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.sql import Select, TextClause
+
+_ENGINE_KEY = 'read_engine'
+_PINNED_KEY = 'read_from_primary'
+_READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _is_read(clause):
+    if isinstance(clause, Select):
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith(('SELECT', 'WITH'))
+    return False
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        # Imported here: unit_of_work needs db, which is built with this class
+        from app.persistence.unit_of_work import in_transaction
+        if bind is None and not self._flushing and _is_read(clause) and not self.info.get(_PINNED_KEY) and not in_transaction():
+            engine = read_engine(current_app)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def pin_primary(session):
+    """Read from the primary for the rest of the session (read-your-writes)"""
+    session.info[_PINNED_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _pin_after_flush(session, flush_context):
+    pin_primary(session)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _pin_after_write(orm_execute_state):
+    if not _is_read(orm_execute_state.statement):
+        pin_primary(orm_execute_state.session)
+
+
+def read_only_uri(path):
+    """SQLAlchemy URI opening the SQLite file at `path` read-only"""
+    return f'sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true'
+
+
+def read_engine(app):
+    return app.extensions.get(_ENGINE_KEY)
+
+
+def install(app, db, uri):
+    """Create the read engine of `app` and pin the session of every writing
+    request to the primary; returns the engine"""
+    engine = app.extensions[_ENGINE_KEY] = create_engine(uri)
+
+    @app.before_request
+    def pin_writes():
+        if request.method not in _READ_METHODS:
+            pin_primary(db.session())
+
+    return engine
+
+
+def refresh_replica(engine, path):
+    """Copy the primary database of `engine` to the file at `path` with the SQLite
+    backup API, then swap it in atomically so readers never see a partial copy.
+
+    Connections already open on the old file keep reading it; dispose the read
+    engine afterwards so its pool reopens the new copy.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.db')
+    os.close(fd)
+    try:
+        target = sqlite3.connect(tmp_path)
+        try:
+            with engine.connect() as conn:
+                conn.connection.dbapi_connection.backup(target)
+            # Readers of a WAL database need write access to its -shm file
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,90 @@
+"""R*Tree index over the coordinates of places (SQLite only).
+
+places_rtree holds one bounding box per place, keyed by the index_key of
+its row in places (see index_keys), which VACUUM leaves as it is.
+Triggers keep it in sync with every insert, coordinate update and delete
+on places, whichever code path issued them.
+"""
+import math
+from sqlalchemy import event, text
+from app.models.place import Place
+from app.persistence import index_keys
+
+EARTH_RADIUS_KM = 6371.0088
+
+_TRIGGERS = ('places_rtree_insert', 'places_rtree_update', 'places_rtree_delete')
+_STATEMENTS = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)',
+    # A place enters the R*Tree once the insert trigger of index_keys has given it its key
+    '''CREATE TRIGGER IF NOT EXISTS places_rtree_insert AFTER UPDATE OF index_key ON places WHEN old.index_key IS NULL BEGIN
+        INSERT INTO places_rtree VALUES (new.index_key, new.latitude, new.latitude, new.longitude, new.longitude);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS places_rtree_update AFTER UPDATE OF latitude, longitude ON places BEGIN
+        UPDATE places_rtree SET min_lat = new.latitude, max_lat = new.latitude,
+            min_lon = new.longitude, max_lon = new.longitude WHERE id = new.index_key;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS places_rtree_delete AFTER DELETE ON places BEGIN
+        DELETE FROM places_rtree WHERE id = old.index_key;
+    END''',
+]
+
+
+def install(connection):
+    """Create the R*Tree and its triggers if missing; returns whether it was
+    created, or keyed on rowid before and must be refilled"""
+    if connection.dialect.name != 'sqlite':
+        return False
+    exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'places_rtree'")).first()
+    insert = connection.execute(text("SELECT sql FROM sqlite_master WHERE name = 'places_rtree_insert'")).scalar()
+    stale = insert is not None and 'index_key' not in insert
+    if stale:
+        for trigger in _TRIGGERS:
+            connection.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+        connection.execute(text('DELETE FROM places_rtree'))
+    index_keys.install(connection, 'places')
+    for statement in _STATEMENTS:
+        connection.execute(text(statement))
+    return exists is None or stale
+
+
+def rebuild(connection):
+    """Refill the R*Tree from places"""
+    connection.execute(text('DELETE FROM places_rtree'))
+    connection.execute(text('INSERT INTO places_rtree SELECT index_key, latitude, latitude, longitude, longitude '
+                            'FROM places WHERE index_key IS NOT NULL'))
+
+
+@event.listens_for(Place.__table__, 'after_create')
+def _create(table, connection, **kw):
+    install(connection)
+
+
+@event.listens_for(Place.__table__, 'before_drop')
+def _drop(table, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text('DROP TABLE IF EXISTS places_rtree'))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """Latitude range and longitude ranges covering every point within radius_km.
+
+    The longitude ranges are split in two when the box crosses the
+    antimeridian, and cover the whole circle when it reaches a pole.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+    dlon = math.degrees(math.asin(math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
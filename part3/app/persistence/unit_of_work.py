@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+from app import db
+
+_DEPTH_KEY = 'unit_of_work_depth'
+
+
+@contextmanager
+def transaction():
+    """Group every repository write made inside the block into one commit.
+
+    Blocks can be nested; only the outermost one commits, and any exception
+    rolls the whole unit of work back.
+    """
+    depth = db.session.info.get(_DEPTH_KEY, 0)
+    db.session.info[_DEPTH_KEY] = depth + 1
+    try:
+        yield db.session
+        if depth == 0:
+            db.session.commit()
+    except Exception:
+        if depth == 0:
+            db.session.rollback()
+        raise
+    finally:
+        db.session.info[_DEPTH_KEY] = depth
+
+
+def in_transaction():
+    return db.session.info.get(_DEPTH_KEY, 0) > 0
+
+
+def commit():
+    """Commit now, or leave it to the enclosing unit of work"""
+    if not in_transaction():
+        db.session.commit()
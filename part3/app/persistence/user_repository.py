@@ -3,6 +3,10 @@ from app import db
 from app.persistence.repository import SQLAlchemyRepository
 
 class UserRepository(SQLAlchemyRepository):
+    # The cache of a worker only sees the writes of that worker: a changed
+    # password or a revoked admin would keep working on the other ones
+    cacheable = False
+
     def __init__(self):
         super().__init__(User)
 
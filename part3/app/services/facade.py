@@ -7,6 +7,7 @@ from app.persistence.user_repository import UserRepository
 from app.persistence.amenity_repository import AmenityRepository
 from app.persistence.place_repository import PlaceRepository
 from app.persistence.review_repository import ReviewRepository
+from app.persistence.unit_of_work import transaction
 
 class HBnBFacade:
     def __init__(self):
@@ -15,15 +16,27 @@ class HBnBFacade:
         self.place_repo = PlaceRepository()
         self.review_repo = ReviewRepository()
 
+    def configure_cache(self, maxsize, ttl=None):
+        for repo in (self.user_repo, self.amenity_repo, self.place_repo, self.review_repo):
+            repo.configure_cache(maxsize, ttl)
+
+    def cache_stats(self):
+        repos = {'users': self.user_repo, 'amenities': self.amenity_repo, 'places': self.place_repo, 'reviews': self.review_repo}
+        return {name: repo.cache.stats() for name, repo in repos.items() if repo.cache is not None}
+
     # USER
     def create_user(self, user_data):
-        user = User(**user_data)
-        self.user_repo.add(user)
+        with transaction():
+            user = User(**user_data)
+            self.user_repo.add(user)
         return user
     
     def get_users(self):
         return self.user_repo.get_all()
 
+    def get_users_page(self, limit, after=None):
+        return self.user_repo.get_page(limit, after)
+
     def get_user(self, user_id):
         return self.user_repo.get(user_id)
 
@@ -31,12 +44,26 @@ class HBnBFacade:
         return self.user_repo.get_by_attribute('email', email)
     
     def update_user(self, user_id, user_data):
-        self.user_repo.update(user_id, user_data)
+        with transaction():
+            self.user_repo.update(user_id, user_data)
+
+    def delete_user(self, user_id):
+        """Delete a user with their places and reviews; whether the user existed"""
+        with transaction():
+            self.place_repo.discount_reviews_by(user_id)
+            self.review_repo.delete_by_user(user_id)
+            self.place_repo.delete_by_owner(user_id)
+            user = self.user_repo.delete_owned(user_id)
+        if user is None:
+            return False
+        User.emails.discard(user.email)
+        return True
     
     # AMENITY
     def create_amenity(self, amenity_data):
-        amenity = Amenity(**amenity_data)
-        self.amenity_repo.add(amenity)
+        with transaction():
+            amenity = Amenity(**amenity_data)
+            self.amenity_repo.add(amenity)
         return amenity
 
     def get_amenity(self, amenity_id):
@@ -45,8 +72,12 @@ class HBnBFacade:
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    def get_amenities_page(self, limit, after=None):
+        return self.amenity_repo.get_page(limit, after)
+
     def update_amenity(self, amenity_id, amenity_data):
-        return self.amenity_repo.update(amenity_id, amenity_data)
+        with transaction():
+            return self.amenity_repo.update(amenity_id, amenity_data)
 
     # PLACE
     def create_place(self, place_data, owner_id):
@@ -54,31 +85,53 @@ class HBnBFacade:
         if not user:
             raise KeyError('Invalid input data')
         place_data['owner'] = user
-        amenities = place_data.pop('amenities', None)
-        if amenities:
-            for a in amenities:
-                amenity = self.get_amenity(a['id'])
-                if not amenity:
-                    raise KeyError('Invalid input data')
-        place = Place(**place_data)
-        self.place_repo.add(place)
-        user.add_place(place)
-        if amenities:
-            for amenity in amenities:
-                place.add_amenity(amenity)
+        place_data['amenities'] = self._get_amenities(place_data.pop('amenities', None) or [])
+        with transaction():
+            place = Place(**place_data)
+            self.place_repo.add(place)
         return place
 
+    def add_amenities_to_place(self, place_id, amenities):
+        amenity_ids = [amenity.id for amenity in self._get_amenities(amenities)]
+        with transaction():
+            self.place_repo.add_amenities(place_id, amenity_ids)
+
+    def _get_amenities(self, amenities):
+        """Resolve a list of amenity ids (or {'id': ...} dicts) with one query"""
+        amenity_ids = {a['id'] if isinstance(a, dict) else a for a in amenities}
+        found = self.amenity_repo.get_many(amenity_ids)
+        if len(found) != len(amenity_ids):
+            raise KeyError('Invalid input data')
+        return found
+
     def get_place(self, place_id):
         return self.place_repo.get(place_id)
 
     def get_all_places(self):
-        return self.place_repo.get_all()
+        return self.place_repo.get_all_with_details()
 
-    def update_place(self, place_id, place_data):
-        return self.place_repo.update(place_id, place_data)
-    
-    def delete_place(self, place_id):
-        self.place_repo.delete(place_id)
+    def get_places_page(self, limit, after=None):
+        return self.place_repo.get_page_with_details(limit, after)
+
+    def search_places_page(self, limit, after=None, min_price=None, max_price=None, amenity_ids=(), owner_id=None):
+        return self.place_repo.search(limit, after, min_price=min_price, max_price=max_price,
+                                      amenity_ids=amenity_ids, owner_id=owner_id)
+
+    def get_places_nearby(self, lat, lon, radius_km, limit):
+        return self.place_repo.nearby(lat, lon, radius_km, limit)
+
+    def search_places_text(self, q, limit, after=None):
+        return self.place_repo.search_text(q, limit, after)
+
+    def update_place(self, place_id, place_data, user_id=None):
+        """None if the place does not exist, PermissionError if user_id does not own it (None: admin)"""
+        with transaction():
+            return self.place_repo.update_owned(place_id, place_data, user_id)
+
+    def delete_place(self, place_id, user_id=None):
+        """Whether the place existed; PermissionError as in update_place"""
+        with transaction():
+            return self.place_repo.delete_owned(place_id, user_id) is not None
 
     # REVIEWS
     def create_review(self, review_data, user_id):
@@ -93,17 +146,15 @@ class HBnBFacade:
         del review_data['place_id']
         review_data['place'] = place
 
-        if place.owner.id == user.id:
+        if place.user_id == user.id:
             raise KeyError("You cannot review your own place.")
 
-        for r in place.reviews:
-            if r.user.id == user.id:
+        with transaction():
+            review = Review(**review_data)
+            # The unique (place_id, user_id) index turns a second review into a no-op
+            if not self.review_repo.add_unless_reviewed(review):
                 raise KeyError('You have already reviewed this place.')
-
-        review = Review(**review_data)
-        self.review_repo.add(review)
-        user.add_review(review)
-        place.add_review(review)
+            self.place_repo.adjust_rating(place.id, 1, review.rating)
         return review
         
     def get_review(self, review_id):
@@ -112,21 +163,34 @@ class HBnBFacade:
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
+    def get_reviews_page(self, limit, after=None):
+        return self.review_repo.get_page(limit, after)
+
     def get_reviews_by_place(self, place_id):
         place = self.place_repo.get(place_id)
         if not place:
             raise KeyError('Place not found')
         return place.reviews
 
-    def update_review(self, review_id, review_data):
-        return self.review_repo.update(review_id, review_data)
-
-    def delete_review(self, review_id):
-        review = self.review_repo.get(review_id)
-        
-        user = self.user_repo.get(review.user.id)
-        place = self.place_repo.get(review.place.id)
-
-        user.delete_review(review)
-        place.delete_review(review)
-        self.review_repo.delete(review_id)
+    def get_reviews_page_by_place(self, place_id, limit, after=None):
+        return self.review_repo.get_page_by_place(place_id, limit, after)
+
+    def update_review(self, review_id, review_data, user_id=None):
+        """None if the review does not exist, PermissionError if user_id did not write it (None: admin)"""
+        with transaction():
+            if 'rating' in review_data:
+                self.place_repo.rerate_review(review_id, review_data['rating'], user_id)
+            return self.review_repo.update_owned(review_id, review_data, user_id)
+
+    def delete_review(self, review_id, user_id=None):
+        """Whether the review existed; PermissionError as in update_review"""
+        with transaction():
+            review = self.review_repo.delete_owned(review_id, user_id)
+            if review is None:
+                return False
+            self.place_repo.adjust_rating(review.place_id, -1, -review.rating)
+            return True
+
+    def rebuild_place_ratings(self):
+        with transaction():
+            self.place_repo.rebuild_ratings()
@@ -0,0 +1,76 @@
+import unittest
+import uuid
+from sqlalchemy import event
+from app import create_app, db
+from app.models.place import Place
+from app.models.review import Review
+from app.services import facade
+import config
+
+
+class TestBulkInsert(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owner = facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'})
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT'):
+            self.statements.append((statement, executemany))
+
+    def make_places(self, count):
+        return [Place(title=f'Place {i}', description='A nice place to stay', price=100.0, latitude=1.0, longitude=2.0, owner=self.owner) for i in range(count)]
+
+    def test_add_many_uses_executemany(self):
+        places = facade.place_repo.add_many(self.make_places(250), batch_size=100)
+        self.assertEqual(Place.query.count(), 250)
+        self.assertEqual([executemany for _, executemany in self.statements], [True, True, True])
+        self.assertEqual(db.session.get(Place, places[0].id).user_id, self.owner.id)
+
+    def test_add_many_from_dicts_runs_validators(self):
+        rows = [{'title': 'Place', 'price': 100.0, 'latitude': 1.0, 'longitude': 2.0, 'user_id': self.owner.id},
+                {'title': 'Place', 'price': -1.0, 'latitude': 1.0, 'longitude': 2.0, 'user_id': self.owner.id}]
+        with self.assertRaises(ValueError):
+            facade.place_repo.add_many(rows)
+        self.assertEqual(Place.query.count(), 0)
+
+    def test_add_many_resolves_foreign_keys(self):
+        place = facade.place_repo.add_many(self.make_places(1))[0]
+        guest = facade.create_user({'first_name': 'Jane', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'})
+        review = facade.review_repo.add_many([Review(text='Great stay!', rating=5, place=place, user=guest)])[0]
+        stored = db.session.get(Review, review.id)
+        self.assertEqual((stored.place_id, stored.user_id), (place.id, guest.id))
+
+    def test_upsert_many(self):
+        place = facade.place_repo.add_many(self.make_places(1))[0]
+        place.price = 50.0
+        facade.place_repo.upsert_many([place] + self.make_places(1))
+        db.session.expire_all()
+        self.assertEqual(Place.query.count(), 2)
+        self.assertEqual(db.session.get(Place, place.id).price, 50.0)
+
+    def test_upsert_many_keeps_rating_aggregates(self):
+        place = facade.place_repo.add_many(self.make_places(1))[0]
+        guest = facade.create_user({'first_name': 'Jane', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'})
+        facade.create_review({'text': 'Great stay!', 'rating': 4, 'place_id': place.id}, guest.id)
+        # A transient copy of the row, whose aggregates are the defaults
+        copy = self.make_places(1)[0]
+        copy.id, copy.price = place.id, 80.0
+        facade.place_repo.upsert_many([copy])
+        db.session.expire_all()
+        stored = db.session.get(Place, place.id)
+        self.assertEqual((stored.price, stored.review_count, stored.rating_sum), (80.0, 1, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
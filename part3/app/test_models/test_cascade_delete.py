@@ -0,0 +1,69 @@
+import unittest
+import uuid
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.amenities_places import AmenityPlace
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.instrumentation import assert_max_queries
+from app.services import facade
+import config
+
+
+class TestCascadeDelete(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.email = f'{uuid.uuid4()}@example.com'
+        self.user_id = self.create_user(self.email)
+        self.other_id = self.create_user()
+        amenity_id = facade.create_amenity({'name': 'Wi-Fi'}).id
+        self.own_places = [self.create_place(self.user_id, [amenity_id]) for _ in range(3)]
+        self.other_place = self.create_place(self.other_id, [amenity_id])
+        # Reviews on the user's places, and by the user on someone else's place
+        for place_id in self.own_places:
+            facade.create_review({'text': 'Great stay!', 'rating': 5, 'place_id': place_id}, self.other_id)
+        facade.create_review({'text': 'Not great', 'rating': 2, 'place_id': self.other_place}, self.user_id)
+        facade.create_review({'text': 'Great stay!', 'rating': 4, 'place_id': self.other_place}, self.create_user())
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_user(self, email=None):
+        return facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': email or f'{uuid.uuid4()}@example.com', 'password': 'password'}).id
+
+    def create_place(self, owner_id, amenities):
+        return facade.create_place({'title': 'Cozy Apartment', 'description': 'A nice place', 'price': 100.0,
+                                    'latitude': 1.0, 'longitude': 2.0, 'amenities': amenities}, owner_id).id
+
+    def test_delete_user_cascades(self):
+        with assert_max_queries(6):
+            self.assertTrue(facade.delete_user(self.user_id))
+        self.assertIsNone(db.session.get(User, self.user_id))
+        self.assertEqual([place.id for place in Place.query], [self.other_place])
+        self.assertEqual(Review.query.count(), 1)
+        self.assertEqual(AmenityPlace.query.count(), 1)
+        place = db.session.get(Place, self.other_place)
+        self.assertEqual((place.review_count, place.rating_sum), (1, 4))
+        # The email can be registered again
+        self.create_user(self.email)
+        self.assertFalse(facade.delete_user(self.user_id))
+
+    def test_api(self):
+        url = f'/api/v1/users/{self.user_id}'
+        headers = {'Authorization': f"Bearer {create_access_token(identity=self.other_id, additional_claims={'is_admin': False})}"}
+        self.assertEqual(self.client.delete(url, headers=headers).status_code, 403)
+        headers = {'Authorization': f"Bearer {create_access_token(identity=self.user_id, additional_claims={'is_admin': False})}"}
+        self.assertEqual(self.client.delete(url, headers=headers).status_code, 200)
+        self.assertEqual(self.client.delete(url, headers=headers).status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
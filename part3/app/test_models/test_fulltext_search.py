@@ -0,0 +1,104 @@
+import unittest
+import uuid
+from sqlalchemy import text
+from app import create_app, db
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.migrations import upgrade
+from app.services import facade
+import config
+
+
+class TestFullTextSearch(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.owner = User(first_name='John', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+        self.guest = User(first_name='Jane', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+        self.loft = Place(title='Sunny loft', description='Bright loft near the canal', price=90.0, latitude=1.0, longitude=2.0, owner=self.owner)
+        self.cabin = Place(title='Mountain cabin', description='Quiet wooden cabin', price=70.0, latitude=1.0, longitude=2.0, owner=self.owner)
+        self.studio = Place(title='Studio', description='Small studio', price=50.0, latitude=1.0, longitude=2.0, owner=self.owner)
+        db.session.add_all([self.loft, self.cabin, self.studio,
+                            Review(text='Lovely view over the canal', rating=5, place=self.cabin, user=self.guest)])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def search(self, q, limit=10, after=None):
+        hits, next_key = facade.search_places_text(q, limit, after)
+        return [place.id for place, _ in hits], next_key
+
+    def test_matches_places_and_reviews(self):
+        self.assertEqual(self.search('canal')[0], [self.loft.id, self.cabin.id])
+        self.assertEqual(self.search('wood')[0], [self.cabin.id])
+        self.assertEqual(self.search('sunny canal')[0], [self.loft.id])
+        self.assertEqual(self.search('beach')[0], [])
+        # FTS5 operators are searched as plain words
+        self.assertEqual(self.search('loft AND "NEAR(')[0], [])
+
+    def test_snippet_highlights_match(self):
+        hits, _ = facade.search_places_text('view', 10)
+        self.assertEqual(hits[0][1], 'Lovely <mark>view</mark> over the canal')
+
+    def test_snippet_escapes_text(self):
+        facade.update_place(self.studio.id, {'title': '<script>alert(1)</script> studio'})
+        hits, _ = facade.search_places_text('alert', 10)
+        self.assertEqual(hits[0][1], '&lt;script&gt;<mark>alert</mark>(1)&lt;/script&gt; studio')
+        response = self.client.get('/api/v1/places/search?q=alert')
+        self.assertNotIn('<script>', response.json[0]['snippet'])
+
+    def test_index_follows_writes(self):
+        facade.update_place(self.studio.id, {'description': 'Small studio by the canal'})
+        self.assertIn(self.studio.id, self.search('canal')[0])
+        self.assertEqual(self.search('small')[0], [self.studio.id])
+        db.session.delete(self.studio)
+        db.session.commit()
+        self.assertEqual(self.search('studio')[0], [])
+
+    def test_cursor_walks_all_results(self):
+        facade.place_repo.add_many([{'title': f'Canal house {i}', 'description': 'On the canal', 'price': 80.0,
+                                     'latitude': 1.0, 'longitude': 2.0, 'user_id': self.owner.id} for i in range(5)])
+        expected, _ = self.search('canal', limit=100)
+        seen, after = [], None
+        while True:
+            page, after = self.search('canal', limit=2, after=after)
+            seen += page
+            if after is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 7)
+
+    def test_survives_renumbered_rowids(self):
+        # What VACUUM may do to a table without an INTEGER PRIMARY KEY
+        db.session.execute(text('UPDATE places SET rowid = 100 - rowid'))
+        db.session.commit()
+        self.assertEqual(self.search('sunny')[0], [self.loft.id])
+        self.assertEqual(self.search('view')[0], [self.cabin.id])
+
+    def test_upgrade_builds_missing_index(self):
+        db.session.execute(text('DROP TABLE places_fts'))
+        db.session.commit()
+        upgrade(db.engine)
+        self.assertEqual(self.search('sunny')[0], [self.loft.id])
+
+    def test_api(self):
+        response = self.client.get('/api/v1/places/search?q=canal&limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([place['id'] for place in response.json], [self.loft.id])
+        self.assertIn('<mark>canal</mark>', response.json[0]['snippet'])
+        response = self.client.get(response.headers['Link'][1:response.headers['Link'].index('>')])
+        self.assertEqual([place['id'] for place in response.json], [self.cabin.id])
+        self.assertNotIn('Link', response.headers)
+        self.assertEqual(self.client.get('/api/v1/places/search?q=%20').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places/search?q=canal&cursor=YWJj').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import uuid
+from app import create_app, db
+from app.models.amenities_places import AmenityPlace
+from app.models.amenity import Amenity
+from app.persistence.instrumentation import assert_max_queries, recording
+from app.persistence.repository import InMemoryRepository
+from app.services import facade
+import config
+
+
+class TestGetMany(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.amenities = facade.amenity_repo.add_many([{'name': f'Amenity {i}'} for i in range(50)])
+        self.amenity_ids = [amenity.id for amenity in self.amenities]
+        owner = facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'})
+        self.owner_id = owner.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_place(self, amenities=None):
+        data = {'title': 'Cozy Apartment', 'description': 'A nice place', 'price': 100.0, 'latitude': 1.0, 'longitude': 2.0}
+        if amenities is not None:
+            data['amenities'] = amenities
+        return facade.create_place(data, self.owner_id)
+
+    def test_get_many(self):
+        found = facade.amenity_repo.get_many(self.amenity_ids[:3] + ['missing', self.amenity_ids[0]])
+        self.assertEqual({amenity.id for amenity in found}, set(self.amenity_ids[:3]))
+        self.assertEqual(facade.amenity_repo.get_many([]), [])
+
+    def test_in_memory_get_many(self):
+        repo = InMemoryRepository()
+        for amenity in self.amenities[:2]:
+            repo.add(amenity)
+        self.assertEqual(repo.get_many([self.amenity_ids[1], 'missing']), [self.amenities[1]])
+
+    def test_attach_fifty_amenities_in_two_statements(self):
+        place = self.create_place()
+        place_id = place.id
+        with assert_max_queries(2):
+            facade.add_amenities_to_place(place_id, [{'id': amenity_id} for amenity_id in self.amenity_ids])
+        self.assertEqual(AmenityPlace.query.filter_by(place_id=place.id).count(), 50)
+        self.assertEqual(len(place.amenities), 50)
+        # Attaching again is a no-op rather than an integrity error
+        facade.add_amenities_to_place(place.id, self.amenity_ids[:5])
+        self.assertEqual(AmenityPlace.query.filter_by(place_id=place.id).count(), 50)
+
+    def test_unknown_amenity_is_rejected(self):
+        place = self.create_place()
+        with self.assertRaises(KeyError):
+            facade.add_amenities_to_place(place.id, self.amenity_ids[:3] + ['missing'])
+        self.assertEqual(AmenityPlace.query.count(), 0)
+
+    def test_create_place_with_amenities(self):
+        with recording() as recorder:
+            place = self.create_place(self.amenity_ids[:10])
+        amenity_selects = [s for s, _ in recorder.statements if s.startswith('SELECT') and 'FROM amenities' in s]
+        self.assertEqual(len(amenity_selects), 1)
+        self.assertEqual(sorted(amenity.id for amenity in place.amenities), sorted(self.amenity_ids[:10]))
+        with self.assertRaises(KeyError):
+            self.create_place(['missing'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+from app import create_app, db
+from app.models.amenities_places import AmenityPlace
+from app.models.place import Place
+from app.models.review import Review
+import config
+
+
+class TestIndexes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def query_plan(self, query):
+        statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')).all()
+        return [row[-1] for row in rows]
+
+    def assert_uses_index(self, query):
+        plan = self.query_plan(query)
+        self.assertTrue(plan, plan)
+        for step in plan:
+            self.assertFalse(step.startswith('SCAN'), f'full table scan: {plan}')
+
+    def test_hot_queries_use_indexes(self):
+        db.create_all()
+        self.assert_uses_index(Review.query.filter_by(place_id='p'))
+        self.assert_uses_index(Review.query.filter_by(user_id='u'))
+        self.assert_uses_index(Review.query.filter_by(place_id='p', user_id='u'))
+        self.assert_uses_index(Place.query.filter_by(user_id='u'))
+        self.assert_uses_index(AmenityPlace.query.filter_by(amenity_id='a'))
+        self.assert_uses_index(Place.query.filter(Place.price.between(50, 100)))
+        self.assert_uses_index(Place.query.filter(Place.latitude.between(1, 2)))
+        self.assert_uses_index(Place.query.filter(Place.longitude.between(1, 2)))
+
+    def test_upgrade_existing_database(self):
+        # A database created before the indexes were declared
+        with db.engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                conn.execute(text(str(CreateTable(table).compile(db.engine))))
+        self.assertEqual(inspect(db.engine).get_indexes('reviews'), [])
+
+        runner = self.app.test_cli_runner()
+        for _ in range(2):
+            result = runner.invoke(args=['upgrade-db'])
+            self.assertEqual(result.exit_code, 0, result.output)
+
+        indexes = {index['name']: index for index in inspect(db.engine).get_indexes('reviews')}
+        self.assertTrue(indexes['ix_reviews_place_id_user_id']['unique'])
+        self.assertIn('ix_reviews_user_id', indexes)
+        self.assert_uses_index(Review.query.filter_by(user_id='u'))
+
+    def test_upgrade_refuses_duplicate_reviews(self):
+        # Reviews written before the unique index existed, on a places table
+        # that does not have the aggregate columns yet
+        with db.engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                conn.execute(text(str(CreateTable(table).compile(db.engine))
+                                  .replace('\n\treview_count INTEGER DEFAULT \'0\' NOT NULL, ', '')
+                                  .replace('\n\trating_sum INTEGER DEFAULT \'0\' NOT NULL, ', '')))
+            for review_id in ('r1', 'r2', 'r3'):
+                conn.execute(text("INSERT INTO reviews (id, text, rating, place_id, user_id) "
+                                  "VALUES (:id, 'Nice', 4, 'p1', 'u1')"), {'id': review_id})
+
+        result = self.app.test_cli_runner().invoke(args=['upgrade-db'])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('ix_reviews_place_id_user_id cannot be created', result.output)
+        self.assertIn('place_id=p1, user_id=u1: 3 rows', result.output)
+        # Nothing was changed
+        self.assertEqual(inspect(db.engine).get_indexes('reviews'), [])
+        self.assertNotIn('review_count', [column['name'] for column in inspect(db.engine).get_columns('places')])
+
+        db.session.execute(text("DELETE FROM reviews WHERE id != 'r1'"))
+        db.session.commit()
+        result = self.app.test_cli_runner().invoke(args=['upgrade-db'])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
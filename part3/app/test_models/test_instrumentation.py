@@ -0,0 +1,96 @@
+import unittest
+from unittest import mock
+from sqlalchemy import bindparam, text
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.persistence.instrumentation import assert_max_queries, recording
+import config
+
+
+class SlowQueryConfig(config.TestingConfig):
+    SLOW_QUERY_MS = 0
+
+
+class TestSlowQueryThreshold(unittest.TestCase):
+    def threshold(self, value):
+        with mock.patch.dict('os.environ', {'SLOW_QUERY_MS': value}):
+            return config._threshold_ms('SLOW_QUERY_MS', 100.0)
+
+    def test_parsing(self):
+        with mock.patch.dict('os.environ', clear=True):
+            self.assertEqual(config._threshold_ms('SLOW_QUERY_MS', 100.0), 100.0)
+        self.assertEqual(self.threshold('250'), 250.0)
+        for disabled in ('', '0', 'off', ' OFF '):
+            self.assertIsNone(self.threshold(disabled))
+        for invalid in ('fast', '-5', 'nan'):
+            with self.assertRaises(ValueError) as context:
+                self.threshold(invalid)
+            self.assertIn('SLOW_QUERY_MS', str(context.exception))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(SlowQueryConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([Amenity(name=f'Amenity {i}') for i in range(3)])
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_recording(self):
+        with recording() as outer:
+            db.session.execute(text('SELECT 1'))
+            with recording() as inner:
+                db.session.execute(text('SELECT 2'))
+        self.assertEqual([statement for statement, _ in outer.statements], ['SELECT 1', 'SELECT 2'])
+        self.assertEqual(inner.count, 1)
+        self.assertGreater(outer.duration, 0)
+
+    def test_assert_max_queries(self):
+        with assert_max_queries(1):
+            Amenity.query.all()
+        with self.assertRaises(AssertionError) as context:
+            with assert_max_queries(1):
+                Amenity.query.all()
+                Amenity.query.count()
+        self.assertIn('2 queries executed, 1 expected at most', str(context.exception))
+
+    def test_slow_queries_are_logged_with_plan(self):
+        with self.assertLogs('app.persistence.instrumentation', 'WARNING') as logs:
+            with recording() as recorder:
+                Amenity.query.filter_by(name='Amenity 1').all()
+        self.assertIn('Query plan:', logs.output[0])
+        statement, _, plan = recorder.slow[0]
+        self.assertIn('FROM amenities', statement)
+        self.assertIn('amenities', plan)
+
+    def test_slow_query_log_leaves_out_private_and_bulk_parameters(self):
+        with self.assertLogs('app.persistence.instrumentation', 'WARNING') as logs:
+            db.session.execute(text('SELECT * FROM users WHERE email = :email'), {'email': 'secret@example.com'})
+            db.session.execute(text('SELECT * FROM amenities WHERE name IN :names').bindparams(
+                bindparam('names', expanding=True)), {'names': [f'Amenity {i}' for i in range(200)]})
+            db.session.execute(Amenity.__table__.insert(), [{'id': f'id-{i}', 'name': f'Bulk {i}'} for i in range(50)])
+        private, long, bulk = logs.output
+        self.assertNotIn('secret@example.com', private)
+        self.assertIn('characters)', long)
+        self.assertLess(len(long), 1500)
+        self.assertIn('(50 rows, not logged)', bulk)
+        self.assertNotIn('Bulk 1', bulk)
+
+    def test_debug_headers(self):
+        response = self.client.get('/api/v1/amenities/')
+        self.assertNotIn('X-DB-Query-Count', response.headers)
+        self.app.debug = True
+        response = self.client.get('/api/v1/amenities/')
+        self.assertEqual(response.headers['X-DB-Query-Count'], '1')
+        self.assertIn('X-DB-Time-Ms', response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import tracemalloc
+import unittest
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.persistence.instrumentation import recording
+from app.persistence.repository import InMemoryRepository
+from app.services import facade
+import config
+
+
+class TestIterAll(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add_amenities(self, count):
+        start = Amenity.query.count()
+        facade.amenity_repo.add_many([{'name': f'Amenity {i}'} for i in range(start, start + count)])
+        db.session.remove()
+
+    def peak_memory(self, scan):
+        tracemalloc.start()
+        try:
+            count = sum(1 for _ in scan())
+            return count, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            db.session.remove()
+
+    def test_iter_all_yields_every_row(self):
+        self.add_amenities(25)
+        with recording() as recorder:
+            names = {amenity.name for amenity in facade.amenity_repo.iter_all(batch_size=10)}
+        self.assertEqual(len(names), 25)
+        self.assertEqual(recorder.count, 1)
+
+    def test_peak_memory_does_not_grow_with_table(self):
+        self.add_amenities(1000)
+        small_count, small_peak = self.peak_memory(lambda: facade.amenity_repo.iter_all(batch_size=100))
+        self.add_amenities(9000)
+        large_count, large_peak = self.peak_memory(lambda: facade.amenity_repo.iter_all(batch_size=100))
+        _, get_all_peak = self.peak_memory(facade.amenity_repo.get_all)
+        self.assertEqual((small_count, large_count), (1000, 10000))
+        self.assertLess(large_peak, small_peak * 2)
+        self.assertLess(large_peak * 5, get_all_peak)
+
+    def test_in_memory_iter_all(self):
+        repo = InMemoryRepository()
+        amenities = [Amenity(id=str(i), name=f'Amenity {i}') for i in range(3)]
+        repo.add_many(amenities)
+        seen = []
+        for amenity in repo.iter_all():
+            seen.append(amenity)
+            # Changing the storage does not break the iteration
+            repo.delete(amenities[2].id)
+        self.assertEqual(seen, amenities[:2])
+
+
+if __name__ == "__main__":
+    unittest.main()
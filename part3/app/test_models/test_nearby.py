@@ -0,0 +1,92 @@
+import unittest
+import uuid
+from sqlalchemy import text
+from app import create_app, db
+from app.models.place import Place
+from app.models.user import User
+from app.persistence.migrations import upgrade
+from app.services import facade
+import config
+
+
+class TestNearby(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.owner = User(first_name='John', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+        db.session.add(self.owner)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add_places(self, *coordinates):
+        places = [Place(title=f'Place {i}', description='A nice place', price=100.0, latitude=lat, longitude=lon, user_id=self.owner.id)
+                  for i, (lat, lon) in enumerate(coordinates)]
+        facade.place_repo.add_many(places)
+        return [place.id for place in places]
+
+    def nearby(self, lat, lon, radius_km, limit=20):
+        return [place.id for place, _ in facade.get_places_nearby(lat, lon, radius_km, limit)]
+
+    def rtree_size(self):
+        return db.session.execute(text('SELECT COUNT(*) FROM places_rtree')).scalar()
+
+    def test_closest_first_within_radius(self):
+        # Paris, then about 1 km, 5 km and 50 km away
+        paris, near, mid, far = self.add_places((48.8566, 2.3522), (48.8656, 2.3522), (48.8566, 2.4204), (49.3066, 2.3522))
+        self.assertEqual(self.nearby(48.8566, 2.3522, 10), [paris, near, mid])
+        self.assertEqual(self.nearby(48.8566, 2.3522, 10, limit=2), [paris, near])
+        self.assertEqual(self.nearby(48.8566, 2.3522, 100), [paris, near, mid, far])
+        # Inside the bounding box of a 4.9 km circle but not in the circle
+        corner, = self.add_places((48.8966, 2.4122))
+        self.assertNotIn(corner, self.nearby(48.8566, 2.3522, 4.9))
+
+    def test_crosses_antimeridian(self):
+        east, west = self.add_places((0.0, 179.99), (0.0, -179.99))
+        self.assertEqual(sorted(self.nearby(0.0, 179.995, 5)), sorted([east, west]))
+
+    def test_rtree_follows_writes(self):
+        place_id, = self.add_places((10.0, 10.0))
+        self.assertEqual(self.rtree_size(), 1)
+        facade.update_place(place_id, {'latitude': 20.0, 'longitude': 20.0})
+        self.assertEqual(self.nearby(10.0, 10.0, 50), [])
+        self.assertEqual(self.nearby(20.0, 20.0, 50), [place_id])
+        facade.delete_place(place_id)
+        self.assertEqual(self.rtree_size(), 0)
+
+    def test_survives_renumbered_rowids(self):
+        # What VACUUM may do to a table without an INTEGER PRIMARY KEY
+        first, second = self.add_places((10.0, 10.0), (20.0, 20.0))
+        db.session.execute(text('UPDATE places SET rowid = 100 - rowid'))
+        db.session.commit()
+        self.assertEqual(self.nearby(10.0, 10.0, 50), [first])
+        facade.delete_place(first)
+        self.assertEqual(self.nearby(20.0, 20.0, 50), [second])
+
+    def test_upgrade_fills_rtree(self):
+        self.add_places((10.0, 10.0), (11.0, 11.0))
+        db.session.commit()
+        db.session.execute(text('DROP TABLE places_rtree'))
+        db.session.commit()
+        self.assertEqual(upgrade(db.engine), [])
+        self.assertEqual(self.rtree_size(), 2)
+
+    def test_api(self):
+        place_id, = self.add_places((48.8566, 2.3522))
+        response = self.client.get('/api/v1/places/nearby?lat=48.86&lon=2.35&radius_km=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([place['id'] for place in response.json], [place_id])
+        self.assertAlmostEqual(response.json[0]['distance_km'], 0.411, places=2)
+        self.assertEqual(self.client.get('/api/v1/places/nearby?lat=48.86').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places/nearby?lat=91&lon=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places/nearby?lat=0&lon=0&radius_km=0').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import uuid
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.amenities_places import AmenityPlace
+from app.models.place import Place
+from app.models.review import Review
+from app.persistence.instrumentation import assert_max_queries
+from app.services import facade
+import config
+
+
+class TestOwnedWrites(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.owner_id = self.create_user()
+        self.guest_id = self.create_user()
+        amenity = facade.create_amenity({'name': 'Wi-Fi'})
+        self.place_id = facade.create_place({'title': 'Cozy Apartment', 'description': 'A nice place', 'price': 100.0,
+                                             'latitude': 1.0, 'longitude': 2.0, 'amenities': [amenity.id]}, self.owner_id).id
+        self.review_id = facade.create_review({'text': 'Great stay!', 'rating': 4, 'place_id': self.place_id}, self.guest_id).id
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_user(self):
+        return facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'}).id
+
+    def headers(self, user_id, admin=False):
+        return {'Authorization': f"Bearer {create_access_token(identity=user_id, additional_claims={'is_admin': admin})}"}
+
+    def test_update_is_one_statement(self):
+        with assert_max_queries(1):
+            place = facade.update_place(self.place_id, {'price': 80.0}, self.owner_id)
+        self.assertEqual(place.price, 80.0)
+        with assert_max_queries(2):
+            review = facade.update_review(self.review_id, {'text': 'Even better', 'rating': 5}, self.guest_id)
+        self.assertEqual((review.text, review.rating), ('Even better', 5))
+        self.assertEqual(db.session.get(Place, self.place_id).rating_sum, 5)
+
+    def test_update_rejects_other_keys(self):
+        with self.assertRaises(ValueError) as context:
+            facade.update_place(self.place_id, {'price': 80.0, 'amenities': [], 'user_id': self.guest_id}, self.owner_id)
+        self.assertEqual(str(context.exception), 'Cannot update amenities, user_id')
+        response = self.client.put(f'/api/v1/places/{self.place_id}', json={'owner_id': self.guest_id}, headers=self.headers(self.owner_id))
+        self.assertEqual((response.status_code, response.json['error']), (400, 'Cannot update owner_id'))
+        response = self.client.put(f'/api/v1/reviews/{self.review_id}', json={'rating': 1, 'place_id': 'other'}, headers=self.headers(self.guest_id))
+        self.assertEqual(response.status_code, 400)
+        db.session.expire_all()
+        place = db.session.get(Place, self.place_id)
+        self.assertEqual((place.price, place.user_id, place.rating_sum), (100.0, self.owner_id, 4))
+
+    def test_checks_run_without_instance(self):
+        self.assertEqual(Place.check('price', 80), 80)
+        self.assertEqual(Review.check('id', 'anything'), 'anything')
+        with self.assertRaises(ValueError):
+            Review.check('rating', 6)
+        with self.assertRaises(TypeError):
+            Place.check('latitude', 'north')
+
+    def test_update_keeps_floats(self):
+        place = facade.update_place(self.place_id, {'price': 80.0}, self.owner_id)
+        for value in (place.price, place.latitude, place.longitude):
+            self.assertIsInstance(value, float)
+        response = self.client.put(f'/api/v1/places/{self.place_id}', json={'price': 10.0}, headers=self.headers(self.owner_id))
+        self.assertEqual(response.status_code, 200, response.json)
+        self.assertIsInstance(response.json['price'], float)
+        self.assertIsInstance(response.json['latitude'], float)
+
+    def test_not_found_and_forbidden(self):
+        self.assertIsNone(facade.update_place('missing', {'price': 80.0}, self.owner_id))
+        with self.assertRaises(PermissionError):
+            facade.update_place(self.place_id, {'price': 80.0}, self.guest_id)
+        with self.assertRaises(PermissionError):
+            facade.update_review(self.review_id, {'rating': 1}, self.owner_id)
+        with self.assertRaises(ValueError):
+            facade.update_place(self.place_id, {'price': -1.0}, self.owner_id)
+        db.session.expire_all()
+        place = db.session.get(Place, self.place_id)
+        self.assertEqual((place.price, place.rating_sum), (100.0, 4))
+        self.assertFalse(facade.delete_review('missing', self.guest_id))
+
+    def test_delete_review_updates_aggregates(self):
+        with assert_max_queries(2):
+            self.assertTrue(facade.delete_review(self.review_id, self.guest_id))
+        place = db.session.get(Place, self.place_id)
+        self.assertEqual((place.review_count, place.rating_sum), (0, 0))
+
+    def test_delete_place_with_reviews_and_amenities(self):
+        with assert_max_queries(3):
+            self.assertTrue(facade.delete_place(self.place_id, self.owner_id))
+        self.assertEqual((Place.query.count(), Review.query.count(), AmenityPlace.query.count()), (0, 0, 0))
+
+    def test_api_status_codes(self):
+        url = f'/api/v1/places/{self.place_id}'
+        data = {'title': 'Cozy Apartment', 'description': 'Nicer', 'price': 90.0, 'latitude': 1.0, 'longitude': 2.0}
+        self.assertEqual(self.client.put(url, json=data, headers=self.headers(self.guest_id)).status_code, 403)
+        self.assertEqual(self.client.put('/api/v1/places/missing', json=data, headers=self.headers(self.owner_id)).status_code, 404)
+        response = self.client.put(url, json=data, headers=self.headers(self.guest_id, admin=True))
+        self.assertEqual((response.status_code, response.json['description']), (200, 'Nicer'))
+        review_url = f'/api/v1/reviews/{self.review_id}'
+        self.assertEqual(self.client.delete(review_url, headers=self.headers(self.owner_id)).status_code, 403)
+        self.assertEqual(self.client.delete(review_url, headers=self.headers(self.guest_id)).status_code, 200)
+        self.assertEqual(self.client.delete(review_url, headers=self.headers(self.guest_id)).status_code, 404)
+        self.assertEqual(self.client.delete(url, headers=self.headers(self.owner_id)).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from app import create_app, db
+from app.models.amenity import Amenity
+import config
+
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([Amenity(name=f"Amenity {i}") for i in range(7)])
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_walk_pages_with_link_header(self):
+        url = '/api/v1/amenities/?limit=3'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([amenity['id'] for amenity in response.json])
+            link = response.headers.get('Link')
+            url = link[1:link.index('>')] if link else None
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        ids = [amenity_id for page in pages for amenity_id in page]
+        self.assertEqual(ids, sorted(amenity.id for amenity in Amenity.query.all()))
+
+    def test_last_page_has_no_link(self):
+        response = self.client.get('/api/v1/amenities/?limit=7')
+        self.assertEqual(len(response.json), 7)
+        self.assertNotIn('Link', response.headers)
+
+    def test_next_cursor_header(self):
+        response = self.client.get('/api/v1/amenities/?limit=4')
+        cursor = response.headers['X-Next-Cursor']
+        self.assertIn('X-Next-Cursor', response.headers['Access-Control-Expose-Headers'])
+        response = self.client.get(f'/api/v1/amenities/?limit=4&cursor={cursor}')
+        self.assertEqual(len(response.json), 3)
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/v1/amenities/?limit=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/amenities/?limit=100000').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/amenities/?cursor=%%%').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import uuid
+from app import create_app, db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.persistence.instrumentation import assert_max_queries, recording
+from app.services import facade
+import config
+
+
+class TestPlaceListing(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def make_user(self):
+        user = User(first_name="John", last_name="Doe", email=f"{uuid.uuid4()}@example.com", password="password")
+        db.session.add(user)
+        return user
+
+    def populate(self, count):
+        amenities = [Amenity(name=f"Amenity {uuid.uuid4()}"[:50]) for _ in range(3)]
+        db.session.add_all(amenities)
+        for _ in range(count):
+            owner = self.make_user()
+            guest = self.make_user()
+            place = Place(title="Cozy Apartment", description="A nice place to stay", price=100.0, latitude=37.7749, longitude=-122.4194, owner=owner)
+            for amenity in amenities:
+                place.amenities.append(amenity)
+            db.session.add(Review(text="Great stay!", rating=5, place=place, user=guest))
+        db.session.commit()
+        db.session.expunge_all()
+
+    def count_listing_queries(self):
+        with recording() as recorder:
+            places = [place.to_dict_list() for place in facade.get_all_places()]
+        return len(places), recorder.count
+
+    def test_listing_payload(self):
+        self.populate(2)
+        places = facade.get_all_places()
+        data = places[0].to_dict_list()
+        self.assertEqual(len(data['amenities']), 3)
+        self.assertEqual(len(data['reviews']), 1)
+        self.assertEqual(data['owner']['id'], places[0].user_id)
+
+    def test_listing_query_count_is_constant(self):
+        self.populate(2)
+        small_rows, small_queries = self.count_listing_queries()
+        db.session.expunge_all()
+        self.populate(20)
+        large_rows, large_queries = self.count_listing_queries()
+        self.assertEqual((small_rows, large_rows), (2, 22))
+        self.assertEqual(small_queries, large_queries)
+        self.assertLessEqual(large_queries, 4)
+
+    def test_listing_page_has_no_n_plus_one(self):
+        self.populate(20)
+        with assert_max_queries(4):
+            items, _ = facade.get_places_page(100)
+            [place.to_dict_list() for place in items]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import uuid
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.user import User
+from app.persistence.place_repository import InMemoryPlaceRepository
+from app.services import facade
+import config
+
+
+class TestPlaceSearch(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.wifi = Amenity(name='Wifi')
+        self.pool = Amenity(name='Pool')
+        self.alice = User(first_name='Alice', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+        self.bob = User(first_name='Bob', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+        self.places = [
+            self.make_place(50.0, self.alice, [self.wifi]),
+            self.make_place(120.0, self.alice, [self.wifi, self.pool]),
+            self.make_place(200.0, self.bob, [self.pool]),
+            self.make_place(80.0, self.bob, []),
+        ]
+        db.session.add_all(self.places)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def make_place(self, price, owner, amenities):
+        return Place(title='Cozy Apartment', description='A nice place', price=price, latitude=1.0, longitude=2.0, owner=owner, amenities=amenities)
+
+    def search(self, **filters):
+        items, _ = facade.place_repo.search(100, **filters)
+        return sorted(place.price for place in items)
+
+    def test_filters(self):
+        self.assertEqual(self.search(), [50.0, 80.0, 120.0, 200.0])
+        self.assertEqual(self.search(min_price=80, max_price=150), [80.0, 120.0])
+        self.assertEqual(self.search(owner_id=self.bob.id), [80.0, 200.0])
+        self.assertEqual(self.search(amenity_ids=[self.wifi.id]), [50.0, 120.0])
+        # Every listed amenity must be offered
+        self.assertEqual(self.search(amenity_ids=[self.wifi.id, self.pool.id]), [120.0])
+        self.assertEqual(self.search(amenity_ids=[self.pool.id], owner_id=self.alice.id, max_price=100), [])
+
+    def test_in_memory_repository_matches(self):
+        repo = InMemoryPlaceRepository()
+        repo.add_many(self.places)
+        cases = [{}, {'min_price': 80, 'max_price': 150}, {'owner_id': self.bob.id},
+                 {'amenity_ids': [self.wifi.id, self.pool.id]}, {'amenity_ids': [self.pool.id], 'max_price': 150}]
+        for filters in cases:
+            expected = facade.place_repo.search(2, **filters)
+            self.assertEqual(repo.search(2, **filters), expected, filters)
+
+    def test_api_query_parameters(self):
+        response = self.client.get(f'/api/v1/places/?min_price=60&amenity={self.wifi.id}&amenity={self.pool.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([place['price'] for place in response.json], [120.0])
+        response = self.client.get(f'/api/v1/places/?owner_id={self.alice.id}&limit=1')
+        self.assertEqual(len(response.json), 1)
+        # Filters are carried over to the next page
+        self.assertIn(f'owner_id={self.alice.id}', response.headers['Link'])
+        self.assertEqual(self.client.get('/api/v1/places/?min_price=cheap').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
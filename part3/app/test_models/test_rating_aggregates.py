@@ -0,0 +1,113 @@
+import unittest
+import uuid
+from unittest import mock
+from sqlalchemy import Index, inspect, text
+from sqlalchemy.schema import CreateTable
+from app import create_app, db
+from app.persistence.migrations import upgrade
+from app.services import facade
+import config
+
+
+class TestRatingAggregates(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        owner = self.create_user()
+        self.place_id = facade.create_place({'title': 'Cozy Apartment', 'description': 'A nice place', 'price': 100.0, 'latitude': 1.0, 'longitude': 2.0}, owner.id).id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_user(self):
+        return facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'})
+
+    def review(self, rating):
+        return facade.create_review({'text': 'Great stay!', 'rating': rating, 'place_id': self.place_id}, self.create_user().id)
+
+    def aggregates(self):
+        db.session.expunge_all()
+        place = facade.get_place(self.place_id)
+        return place.review_count, place.rating_sum, place.average_rating
+
+    def test_new_place_has_no_rating(self):
+        place = facade.get_place(self.place_id)
+        self.assertEqual(place.to_dict()['review_count'], 0)
+        self.assertIsNone(place.to_dict()['average_rating'])
+
+    def test_create_update_delete_keep_aggregates(self):
+        self.review(5)
+        review_id = self.review(2).id
+        self.assertEqual(self.aggregates(), (2, 7, 3.5))
+        facade.update_review(review_id, {'text': 'Fine', 'rating': 4})
+        self.assertEqual(self.aggregates(), (2, 9, 4.5))
+        facade.delete_review(review_id)
+        self.assertEqual(self.aggregates(), (1, 5, 5.0))
+
+    def test_rejected_review_leaves_aggregates_unchanged(self):
+        user_id = self.create_user().id
+        facade.create_review({'text': 'Great stay!', 'rating': 3, 'place_id': self.place_id}, user_id)
+        with self.assertRaises(KeyError):
+            facade.create_review({'text': 'Again', 'rating': 5, 'place_id': self.place_id}, user_id)
+        self.assertEqual(self.aggregates(), (1, 3, 3.0))
+
+    def test_rebuild_from_reviews(self):
+        self.review(4)
+        self.review(1)
+        db.session.execute(text('UPDATE places SET review_count = 0, rating_sum = 0'))
+        db.session.commit()
+        facade.rebuild_place_ratings()
+        self.assertEqual(self.aggregates(), (2, 5, 2.5))
+
+    def test_bulk_writes_keep_aggregates(self):
+        guests = [self.create_user() for _ in range(3)]
+        reviews = facade.review_repo.add_many([{'text': 'Great stay!', 'rating': rating, 'place_id': self.place_id, 'user_id': guest.id}
+                                               for guest, rating in zip(guests, (5, 3, 1))])
+        self.assertEqual(self.aggregates(), (3, 9, 3.0))
+        other_id = facade.create_place({'title': 'Other Apartment', 'description': 'A nice place', 'price': 90.0, 'latitude': 1.0, 'longitude': 2.0},
+                                       self.create_user().id).id
+        # Re-rate one review and move another to the other place
+        rows = [{'id': reviews[0].id, 'text': 'Fine', 'rating': 2, 'place_id': self.place_id, 'user_id': guests[0].id},
+                {'id': reviews[1].id, 'text': 'Fine', 'rating': 4, 'place_id': other_id, 'user_id': guests[1].id}]
+        facade.review_repo.upsert_many(rows)
+        self.assertEqual(self.aggregates(), (2, 3, 1.5))
+        other = facade.get_place(other_id)
+        self.assertEqual((other.review_count, other.rating_sum), (1, 4))
+
+    def test_upgrade_adds_columns(self):
+        db.drop_all()
+        # The places table as it was before the aggregate columns existed
+        with db.engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                conn.execute(text(str(CreateTable(table, include_foreign_key_constraints=[]).compile(db.engine))
+                                  .replace('\n\treview_count INTEGER DEFAULT \'0\' NOT NULL, ', '')
+                                  .replace('\n\trating_sum INTEGER DEFAULT \'0\' NOT NULL, ', '')))
+        self.assertNotIn('review_count', [c['name'] for c in inspect(db.engine).get_columns('places')])
+        self.assertEqual(upgrade(db.engine), [('places', 'review_count'), ('places', 'rating_sum')])
+        self.assertEqual(upgrade(db.engine), [])
+
+    def test_upgrade_db_fills_columns_after_an_interrupted_run(self):
+        self.review(4)
+        self.review(2)
+        db.session.remove()
+        with db.engine.begin() as conn:
+            conn.execute(text('ALTER TABLE places DROP COLUMN review_count'))
+            conn.execute(text('ALTER TABLE places DROP COLUMN rating_sum'))
+            conn.execute(text('DROP INDEX ix_reviews_user_id'))
+        runner = self.app.test_cli_runner()
+        # The columns are added, then creating the missing index fails
+        with mock.patch.object(Index, 'create', side_effect=RuntimeError('disk full')):
+            self.assertEqual(runner.invoke(args=['upgrade-db']).exit_code, 1)
+        self.assertEqual(self.aggregates(), (0, 0, None))
+
+        result = runner.invoke(args=['upgrade-db'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.aggregates(), (2, 6, 3.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.persistence import routing
+from app.services import facade
+import config
+
+
+class TestReadRouting(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class ReplicaConfig(config.TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp.name, 'primary.db')}"
+            READ_REPLICA_PATH = os.path.join(self.tmp.name, 'replica.db')
+
+        self.app = create_app(ReplicaConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.refresh()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        routing.read_engine(self.app).dispose()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def refresh(self):
+        result = self.app.test_cli_runner().invoke(args=['refresh-replica'])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+    def add_amenity(self, name):
+        db.session.add(Amenity(name=name))
+        db.session.commit()
+        db.session.remove()
+
+    def test_get_requests_read_the_replica(self):
+        self.add_amenity('Wi-Fi')
+        self.assertEqual(self.client.get('/api/v1/amenities/').json, [])
+        # Requests share the test's app context, hence its session
+        db.session.remove()
+        self.refresh()
+        self.assertEqual([amenity['name'] for amenity in self.client.get('/api/v1/amenities/').json], ['Wi-Fi'])
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        self.assertEqual(facade.get_all_amenities(), [])
+        amenity_id = facade.create_amenity({'name': 'Wi-Fi'}).id
+        db.session.expunge_all()
+        self.assertEqual(facade.get_amenity(amenity_id).name, 'Wi-Fi')
+        db.session.remove()
+        self.assertIsNone(facade.get_amenity(amenity_id))
+        routing.pin_primary(db.session())
+        self.assertIsNotNone(facade.get_amenity(amenity_id))
+
+    def test_writing_requests_validate_against_the_primary(self):
+        self.add_amenity('Wi-Fi')
+        token = create_access_token(identity='admin', additional_claims={'is_admin': True})
+        response = self.client.post('/api/v1/amenities/', json={'name': 'Wi-Fi'}, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_read_engine_is_read_only(self):
+        with self.assertRaises(OperationalError):
+            with routing.read_engine(self.app).begin() as conn:
+                conn.execute(text("INSERT INTO amenities (id, name) VALUES ('x', 'Pool')"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import uuid
+from sqlalchemy import event
+from app import create_app, db
+from app.persistence.cache import LRUCache
+from app.services import facade
+import config
+
+
+class CachedConfig(config.TestingConfig):
+    REPOSITORY_CACHE_SIZE = 100
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction_and_ttl(self):
+        now = [0]
+        cache = LRUCache(2, ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)  # evicts 'b', the least recently used
+        self.assertIsNone(cache.get('b'))
+        now[0] = 11
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats(), {'size': 1, 'hits': 1, 'misses': 2, 'evictions': 2})
+
+
+class TestRepositoryCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(CachedConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.amenity_id = facade.create_amenity({'name': 'Wi-Fi'}).id
+        self.email = f'{uuid.uuid4()}@example.com'
+        self.user_id = facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': self.email, 'password': 'password'}).id
+        self.selects = 0
+        event.listen(db.engine, 'before_cursor_execute', self.count_select)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.count_select)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        facade.configure_cache(0)
+
+    def count_select(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT'):
+            self.selects += 1
+
+    def new_session(self):
+        db.session.remove()
+        self.selects = 0
+
+    def test_get_is_served_from_cache_in_a_new_session(self):
+        amenity_id = self.amenity_id
+        self.new_session()
+        facade.get_amenity(amenity_id)
+        self.new_session()
+        amenity = facade.get_amenity(amenity_id)
+        self.assertEqual(self.selects, 0)
+        self.assertEqual(amenity.to_dict(), {'id': amenity_id, 'name': 'Wi-Fi'})
+        self.assertEqual(facade.amenity_repo.cache.stats()['hits'], 1)
+
+    def test_cached_instance_is_attached(self):
+        place = facade.create_place({'title': 'Cozy Apartment', 'description': 'A nice place', 'price': 100.0, 'latitude': 1.0, 'longitude': 2.0}, self.user_id)
+        place_id = place.id
+        self.new_session()
+        facade.get_place(place_id)
+        self.new_session()
+        place = facade.get_place(place_id)
+        self.assertEqual(place.to_dict_list()['owner']['id'], self.user_id)
+
+    def test_update_invalidates(self):
+        amenity_id = self.amenity_id
+        self.new_session()
+        facade.get_amenity(amenity_id)
+        facade.update_amenity(amenity_id, {'name': 'Pool'})
+        self.new_session()
+        self.assertEqual(facade.get_amenity(amenity_id).name, 'Pool')
+        self.assertEqual(self.selects, 1)
+
+    def test_change_outside_repository_invalidates(self):
+        amenity_id = self.amenity_id
+        self.new_session()
+        facade.get_amenity(amenity_id).name = 'Pool'
+        db.session.commit()
+        self.new_session()
+        self.assertEqual(facade.get_amenity(amenity_id).name, 'Pool')
+
+    def test_get_by_attribute(self):
+        self.new_session()
+        facade.amenity_repo.get_by_attribute('name', 'Wi-Fi')
+        self.new_session()
+        self.assertEqual(facade.amenity_repo.get_by_attribute('name', 'Wi-Fi').id, self.amenity_id)
+        self.assertEqual(self.selects, 0)
+        facade.update_amenity(self.amenity_id, {'name': 'Pool'})
+        self.new_session()
+        self.assertIsNone(facade.amenity_repo.get_by_attribute('name', 'Wi-Fi'))
+
+    def test_users_are_not_cached(self):
+        self.assertIsNone(facade.user_repo.cache)
+        self.new_session()
+        facade.get_user_by_email(self.email)
+        self.new_session()
+        self.assertEqual(facade.get_user_by_email(self.email).id, self.user_id)
+        self.assertEqual(self.selects, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import uuid
+from app import create_app, db
+from app.models.review import Review
+from app.persistence.instrumentation import recording
+from app.services import facade
+import config
+
+
+class TestReviewUniqueness(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owner_id = self.create_user().id
+        self.place_id = facade.create_place({'title': 'Cozy Apartment', 'description': 'A nice place', 'price': 100.0, 'latitude': 1.0, 'longitude': 2.0}, self.owner_id).id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_user(self):
+        return facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'})
+
+    def add_reviews(self, count):
+        users = facade.user_repo.add_many([{'first_name': 'Jane', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'} for _ in range(count)])
+        facade.review_repo.add_many([{'text': 'Great stay!', 'rating': 5, 'place_id': self.place_id, 'user_id': user.id} for user in users])
+
+    def review(self, user_id):
+        db.session.expunge_all()
+        with recording() as recorder:
+            facade.create_review({'text': 'Great stay!', 'rating': 4, 'place_id': self.place_id}, user_id)
+        return recorder.count
+
+    def test_cost_does_not_depend_on_existing_reviews(self):
+        self.add_reviews(5)
+        few = self.review(self.create_user().id)
+        self.add_reviews(100)
+        many = self.review(self.create_user().id)
+        self.assertEqual(few, many)
+
+    def test_second_review_is_rejected(self):
+        user_id = self.create_user().id
+        self.review(user_id)
+        with self.assertRaises(KeyError) as context:
+            self.review(user_id)
+        self.assertEqual(context.exception.args[0], 'You have already reviewed this place.')
+        self.assertEqual(Review.query.filter_by(place_id=self.place_id).count(), 1)
+        # The session is still usable after the rollback
+        self.review(self.create_user().id)
+        self.assertEqual(Review.query.filter_by(place_id=self.place_id).count(), 2)
+
+    def test_add_unless_reviewed(self):
+        user = self.create_user()
+        place = facade.get_place(self.place_id)
+        first = Review(text='Great stay!', rating=4, place=place, user=user)
+        self.assertTrue(facade.review_repo.add_unless_reviewed(first))
+        self.assertIn(first, db.session)
+        self.assertFalse(db.session.is_modified(first))
+        self.assertEqual([review.id for review in place.reviews], [first.id])
+        second = Review(text='Again', rating=1, place=place, user=user)
+        self.assertFalse(facade.review_repo.add_unless_reviewed(second))
+        db.session.expire_all()
+        self.assertEqual([review.rating for review in Review.query.filter_by(place_id=self.place_id)], [4])
+
+    def test_owner_cannot_review(self):
+        with self.assertRaises(KeyError) as context:
+            self.review(self.owner_id)
+        self.assertEqual(context.exception.args[0], 'You cannot review your own place.')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import uuid
+from app import create_app, db
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.instrumentation import assert_max_queries
+import config
+
+
+class TestSerializers(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        owner = User(first_name='John', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+        place = Place(title='Cozy Apartment', description='A nice place', price=100.0, latitude=1.0, longitude=2.0, owner=owner)
+        for _ in range(10):
+            guest = User(first_name='Jane', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+            db.session.add(Review(text='Great stay!', rating=5, place=place, user=guest))
+        db.session.commit()
+        self.owner_id, self.place_id = owner.id, place.id
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_to_dict_reads_foreign_keys(self):
+        place = db.session.get(Place, self.place_id)
+        review = Review.query.first()
+        with assert_max_queries(0):
+            self.assertEqual(place.to_dict()['owner_id'], self.owner_id)
+            self.assertEqual(review.to_dict()['place_id'], self.place_id)
+
+    def test_review_listing_is_one_query(self):
+        with assert_max_queries(1):
+            response = self.client.get('/api/v1/reviews/')
+        self.assertEqual(len(response.json), 10)
+        self.assertEqual({review['place_id'] for review in response.json}, {self.place_id})
+
+
+if __name__ == "__main__":
+    unittest.main()
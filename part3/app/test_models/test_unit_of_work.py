@@ -0,0 +1,60 @@
+import unittest
+import uuid
+from sqlalchemy import event
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.persistence.unit_of_work import transaction
+from app.services import facade
+import config
+
+
+class TestUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.commits = 0
+        event.listen(db.engine, 'commit', self.count_commit)
+
+    def tearDown(self):
+        event.remove(db.engine, 'commit', self.count_commit)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def count_commit(self, conn):
+        self.commits += 1
+
+    def create_user(self):
+        return facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'})
+
+    def test_one_commit_per_operation(self):
+        owner = self.create_user()
+        guest = self.create_user()
+        self.commits = 0
+        place = facade.create_place({'title': 'Cozy Apartment', 'description': 'A nice place to stay', 'price': 100.0, 'latitude': 1.0, 'longitude': 2.0}, owner.id)
+        self.assertEqual(self.commits, 1)
+        self.commits = 0
+        facade.create_review({'text': 'Great stay!', 'rating': 5, 'place_id': place.id}, guest.id)
+        self.assertEqual(self.commits, 1)
+
+    def test_nested_blocks_commit_once(self):
+        with transaction():
+            facade.create_amenity({'name': 'Wi-Fi'})
+            facade.create_amenity({'name': 'Pool'})
+            self.assertEqual(self.commits, 0)
+        self.assertEqual(self.commits, 1)
+        self.assertEqual(Amenity.query.count(), 2)
+
+    def test_rollback_on_error(self):
+        with self.assertRaises(ValueError):
+            with transaction():
+                facade.create_amenity({'name': 'Wi-Fi'})
+                facade.create_amenity({'name': ''})
+        self.assertEqual(self.commits, 0)
+        self.assertEqual(Amenity.query.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import uuid
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.persistence.instrumentation import recording
+from app.services import facade
+import config
+
+
+class TestWriteQueries(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config.TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        owner = facade.create_user({'first_name': 'John', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'})
+        self.headers = {'Authorization': f"Bearer {create_access_token(identity=owner.id, additional_claims={'is_admin': True})}"}
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def post(self, url, data):
+        with recording() as recorder:
+            response = self.client.post(url, json=data, headers=self.headers)
+        self.assertEqual(response.status_code, 201, response.json)
+        return response.json, [statement.split()[0] for statement, _ in recorder.statements]
+
+    def test_create_is_not_reloaded_after_commit(self):
+        amenity, statements = self.post('/api/v1/amenities/', {'name': 'Wi-Fi'})
+        # The duplicate-name check, then the INSERT; nothing after the COMMIT
+        self.assertEqual(statements, ['SELECT', 'INSERT'])
+        self.assertEqual(amenity['name'], 'Wi-Fi')
+        place, statements = self.post('/api/v1/places/', {'title': 'Cozy Apartment', 'description': 'A nice place', 'price': 100.0,
+                                                          'latitude': 1.0, 'longitude': 2.0, 'amenities': []})
+        self.assertEqual(statements, ['SELECT', 'INSERT'])
+        self.assertEqual((place['price'], place['review_count']), (100.0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
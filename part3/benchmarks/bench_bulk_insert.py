@@ -0,0 +1,55 @@
+"""Loading places one repository.add() at a time vs. add_many().
+
+add() commits every row; add_many() validates the rows, then sends them
+with one executemany per batch inside a single transaction.
+
+Usage: python benchmarks/bench_bulk_insert.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from app import create_app, db
+from app.models.place import Place
+from app.models.user import User
+from app.services import facade
+
+
+def make_places(owner, count):
+    return [Place(title=f'Place {i}', description='A nice place to stay', price=100.0, latitude=1.0, longitude=2.0, user_id=owner.id) for i in range(count)]
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    one_by_one = min(rows, 500)
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchmarkConfig(config.Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            BCRYPT_LOG_ROUNDS = 4
+
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            db.create_all()
+            owner = User(first_name='John', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+            db.session.add(owner)
+            db.session.commit()
+
+            places = make_places(owner, one_by_one)
+            start = time.perf_counter()
+            for place in places:
+                facade.place_repo.add(place)
+            add_rate = one_by_one / (time.perf_counter() - start)
+
+            places = make_places(owner, rows)
+            start = time.perf_counter()
+            facade.place_repo.add_many(places)
+            bulk_rate = rows / (time.perf_counter() - start)
+
+            print(f'add()      : {add_rate:10.0f} rows/s  ({one_by_one} rows)')
+            print(f'add_many() : {bulk_rate:10.0f} rows/s  ({rows} rows, {bulk_rate / add_rate:.0f}x)')
@@ -0,0 +1,64 @@
+"""Deleting a user who owns many places with many reviews.
+
+facade.delete_user() runs a handful of set-based statements whatever the
+size of the user's data; deleting the same places one by one with
+delete_place() costs several statements per place.
+
+Usage: python benchmarks/bench_delete_user.py [places] [reviews_per_place]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from app import create_app, db
+from app.persistence.instrumentation import recording
+from app.services import facade
+
+
+def populate(places, reviews_per_place):
+    """A user with `places` places, each reviewed by `reviews_per_place` other users"""
+    user_id = facade.user_repo.add_many([{'first_name': 'John', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'}])[0].id
+    guest_ids = [guest.id for guest in facade.user_repo.add_many(
+        {'first_name': 'Jane', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com', 'password': 'password'} for _ in range(reviews_per_place))]
+    place_ids = [place.id for place in facade.place_repo.add_many(
+        {'title': f'Place {i}', 'description': 'A nice place to stay', 'price': 100.0, 'latitude': 1.0, 'longitude': 2.0, 'user_id': user_id}
+        for i in range(places))]
+    facade.review_repo.add_many({'text': 'Great stay!', 'rating': 5, 'place_id': place_id, 'user_id': guest_id}
+                                for place_id in place_ids for guest_id in guest_ids)
+    db.session.remove()
+    return user_id, place_ids
+
+
+if __name__ == '__main__':
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    reviews_per_place = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchmarkConfig(config.Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            BCRYPT_LOG_ROUNDS = 4
+
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            db.create_all()
+
+            user_id, place_ids = populate(places, reviews_per_place)
+            start = time.perf_counter()
+            with recording() as recorder:
+                for place_id in place_ids:
+                    facade.delete_place(place_id)
+            one_by_one = time.perf_counter() - start
+            print(f'delete_place() x {places}: {one_by_one:7.2f}s  {recorder.count} statements')
+
+            user_id, place_ids = populate(places, reviews_per_place)
+            start = time.perf_counter()
+            with recording() as recorder:
+                facade.delete_user(user_id)
+            cascade = time.perf_counter() - start
+            print(f'delete_user()       : {cascade:7.2f}s  {recorder.count} statements '
+                  f'({places} places, {places * reviews_per_place} reviews, {one_by_one / cascade:.1f}x)')
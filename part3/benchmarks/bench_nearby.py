@@ -0,0 +1,63 @@
+"""Latency of /places/nearby lookups through PlaceRepository.nearby().
+
+Loads places spread over Europe, then times random 10 km searches and
+prints the latency percentiles. The R*Tree narrows each search to the
+bounding box of the circle before the haversine refinement.
+
+Usage: python benchmarks/bench_nearby.py [places] [queries]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from app import create_app, db
+from app.models.user import User
+from app.services import facade
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchmarkConfig(config.ProductionConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            BCRYPT_LOG_ROUNDS = 4
+            REPOSITORY_CACHE_SIZE = 0
+
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            db.create_all()
+            owner = User(first_name='John', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+            db.session.add(owner)
+            db.session.commit()
+            owner_id = owner.id
+
+            start = time.perf_counter()
+            for offset in range(0, rows, 100000):
+                facade.place_repo.add_many({'title': f'Place {i}', 'description': 'A nice place to stay', 'price': 100.0,
+                                            'latitude': rng.uniform(36.0, 60.0), 'longitude': rng.uniform(-10.0, 30.0),
+                                            'user_id': owner_id} for i in range(offset, min(rows, offset + 100000)))
+                db.session.expunge_all()
+            print(f'loaded {rows} places in {time.perf_counter() - start:.1f}s')
+
+            samples, found = [], 0
+            for _ in range(queries):
+                lat, lon = rng.uniform(36.0, 60.0), rng.uniform(-10.0, 30.0)
+                start = time.perf_counter()
+                found += len(facade.get_places_nearby(lat, lon, 10, 20))
+                samples.append((time.perf_counter() - start) * 1000)
+                db.session.expunge_all()
+            samples.sort()
+            print(f'{queries} queries, radius 10 km, limit 20, {found / queries:.1f} places per result')
+            print(f'p50 {percentile(samples, 50):6.2f} ms   p99 {percentile(samples, 99):6.2f} ms   max {samples[-1]:6.2f} ms')
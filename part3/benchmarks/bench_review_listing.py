@@ -0,0 +1,54 @@
+"""Statements and latency of GET /api/v1/reviews/.
+
+Review.to_dict() reads place_id/user_id from the row, so a page of
+reviews is a single SELECT whatever its size.
+
+Usage: python benchmarks/bench_review_listing.py [reviews] [requests]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from app import create_app, db
+from app.models.user import User
+from app.persistence.instrumentation import recording
+from app.services import facade
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchmarkConfig(config.Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            BCRYPT_LOG_ROUNDS = 4
+
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            db.create_all()
+            owner = User(first_name='John', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+            db.session.add(owner)
+            db.session.commit()
+            owner_id = owner.id
+            place = facade.place_repo.add_many([{'title': 'Place', 'description': 'A nice place to stay', 'price': 100.0,
+                                                 'latitude': 1.0, 'longitude': 2.0, 'user_id': owner_id}])[0]
+            guests = facade.user_repo.add_many({'first_name': 'Jane', 'last_name': 'Doe', 'email': f'{uuid.uuid4()}@example.com',
+                                                'password': 'password'} for _ in range(rows))
+            facade.review_repo.add_many({'text': 'Great stay!', 'rating': 5, 'place_id': place.id, 'user_id': guest.id} for guest in guests)
+            db.session.remove()
+
+        client = app.test_client()
+        with recording() as recorder:
+            response = client.get(f'/api/v1/reviews/?limit={rows}')
+        assert len(response.json) == rows
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get(f'/api/v1/reviews/?limit={rows}')
+        elapsed = (time.perf_counter() - start) / requests * 1000
+        print(f'GET /api/v1/reviews/?limit={rows}: {recorder.count} statement(s), {elapsed:.2f} ms per request')
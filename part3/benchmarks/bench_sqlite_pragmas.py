@@ -0,0 +1,96 @@
+"""Concurrent readers and a writer, default SQLite settings vs. ProductionConfig.
+
+One thread keeps writing reviews in small transactions while reader threads
+run the places listing query. With the default rollback journal the readers
+have to wait whenever the writer commits; in WAL mode they read the last
+committed snapshot and carry on.
+
+Usage: python benchmarks/bench_sqlite_pragmas.py [seconds] [readers]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+import config
+from app import create_app, db
+from app.models.place import Place
+from app.models.user import User
+
+LISTING = text('SELECT id, title, price FROM places ORDER BY id LIMIT 100')
+INSERT = text("INSERT INTO reviews (id, text, rating, place_id, user_id) VALUES (:id, 'Great stay!', 5, :place_id, :user_id)")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else float('nan')
+
+
+def run(config_class, seconds, readers):
+    app = create_app(config_class)
+    with app.app_context():
+        db.create_all()
+        owner = User(first_name='John', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password')
+        db.session.add(owner)
+        db.session.commit()
+        db.session.execute(db.insert(Place.__table__), [
+            {'id': str(uuid.uuid4()), 'title': f'Place {i}', 'price': float(i % 200), 'latitude': 1.0, 'longitude': 2.0, 'user_id': owner.id}
+            for i in range(20000)
+        ])
+        db.session.commit()
+        place_id = db.session.execute(text('SELECT id FROM places LIMIT 1')).scalar()
+        engine = db.engine
+
+    stop = time.perf_counter() + seconds
+    latencies = []
+    writes = [0]
+
+    def writer():
+        while time.perf_counter() < stop:
+            with engine.begin() as conn:
+                conn.execute(INSERT, [{'id': str(uuid.uuid4()), 'place_id': place_id, 'user_id': str(uuid.uuid4())} for _ in range(500)])
+            writes[0] += 500
+
+    def reader():
+        local = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            with engine.connect() as conn:
+                conn.execute(LISTING).all()
+            local.append(time.perf_counter() - start)
+        latencies.extend(local)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return len(latencies) / seconds, percentile(latencies, 0.5), percentile(latencies, 0.99), max(latencies) * 1000, writes[0] / seconds
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        class DefaultConfig(config.Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'default.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            BCRYPT_LOG_ROUNDS = 4
+            # Same lock wait as production so readers wait instead of failing
+            SQLITE_PRAGMAS = {'busy_timeout': 5000}
+
+        class TunedConfig(config.ProductionConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'tuned.db')}"
+            BCRYPT_LOG_ROUNDS = 4
+
+        print(f'{readers} readers + 1 writer for {seconds:g}s')
+        for name, config_class in (('default', DefaultConfig), ('production', TunedConfig)):
+            reads, p50, p99, worst, writes = run(config_class, seconds, readers)
+            print(f'{name:<11}: {reads:7.0f} reads/s  p50 {p50:5.2f} ms  p99 {p99:6.2f} ms  max {worst:7.2f} ms | {writes:6.0f} writes/s')
@@ -0,0 +1,67 @@
+"""Write throughput with one commit per repository call vs. one per unit of work.
+
+Each operation creates a place, links three amenities and adds a review,
+which is what POST /places/ followed by POST /reviews/ does. The same
+repository calls run twice: once on their own (every call commits, as
+before), once inside transaction() (a single commit).
+
+Usage: python benchmarks/bench_unit_of_work.py [operations]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.unit_of_work import transaction
+from app.services import facade
+
+
+def create_place(owner, guest, amenities):
+    place = Place(title='Cozy Apartment', description='A nice place to stay', price=100.0, latitude=1.0, longitude=2.0, owner=owner)
+    facade.place_repo.add(place)
+    for amenity in amenities:
+        place.add_amenity(amenity)
+        place.save()
+    facade.review_repo.add(Review(text='Great stay!', rating=5, place=place, user=guest))
+
+
+def run(operations, grouped):
+    start = time.perf_counter()
+    for _ in range(operations):
+        if grouped:
+            with transaction():
+                create_place(owner, guest, amenities)
+        else:
+            create_place(owner, guest, amenities)
+    return operations / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchmarkConfig(config.Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            BCRYPT_LOG_ROUNDS = 4
+
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            db.create_all()
+            owner, guest = (User(first_name='John', last_name='Doe', email=f'{uuid.uuid4()}@example.com', password='password') for _ in range(2))
+            amenities = [Amenity(name=name) for name in ('Wi-Fi', 'Pool', 'Parking')]
+            db.session.add_all([owner, guest, *amenities])
+            db.session.commit()
+
+            before = run(operations, grouped=False)
+            after = run(operations, grouped=True)
+            print(f'commit per call : {before:8.1f} ops/s')
+            print(f'unit of work    : {after:8.1f} ops/s  ({after / before:.1f}x)')
@@ -1,15 +1,81 @@
 import os
 
+
+def _threshold_ms(name, default):
+    """Milliseconds read from the environment variable `name`; None when it
+    is set to '', '0' or 'off'"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ('', '0', 'off'):
+        return None
+    try:
+        ms = float(value)
+    except ValueError:
+        ms = None
+    # `not ms > 0` also turns away nan
+    if ms is None or not ms > 0:
+        raise ValueError(f"{name} must be a positive number of milliseconds, or 'off' to disable it (got {value!r})")
+    return ms
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # PRAGMAs run on every new SQLite connection (app.persistence.sqlite)
+    SQLITE_PRAGMAS = {}
+    # Read-through cache in front of repository get/get_by_attribute (0 disables it).
+    # Each process has its own and only drops the rows it writes itself: with
+    # several workers, the others serve stale rows for up to REPOSITORY_CACHE_TTL
+    # seconds. Users are never cached.
+    REPOSITORY_CACHE_SIZE = 0
+    REPOSITORY_CACHE_TTL = 60
+    # Read-only database for the reads of GET requests (app.persistence.routing); either a URI,
+    # or the path of a replica file refreshed from the primary by `flask refresh-replica`
+    READ_DATABASE_URI = None
+    READ_REPLICA_PATH = None
+    SQLITE_READ_PRAGMAS = {}
+    # Statements slower than this are logged with their query plan (None disables the log;
+    # so do SLOW_QUERY_MS=off, 0 or an empty value in the environment)
+    SLOW_QUERY_MS = _threshold_ms('SLOW_QUERY_MS', 100.0)
 
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///development.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+class ProductionConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///production.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PRAGMAS = {
+        # Readers no longer block on the writer (and vice versa)
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        # Durable at each checkpoint rather than each commit; safe with WAL
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        # Negative values are KiB: 64 MiB of page cache per connection
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64000)),
+        'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+        # Milliseconds a connection waits on a lock before "database is locked"
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    }
+    # Same tuning on the read engine, minus the settings only a writer can change
+    SQLITE_READ_PRAGMAS = {name: value for name, value in SQLITE_PRAGMAS.items() if name not in ('journal_mode', 'synchronous')}
+    SQLITE_READ_PRAGMAS['query_only'] = 'ON'
+    READ_DATABASE_URI = os.getenv('READ_DATABASE_URL')
+    READ_REPLICA_PATH = os.getenv('READ_REPLICA_PATH')
+    # Off by default: only enable it with a single worker process, or stale reads are acceptable
+    REPOSITORY_CACHE_SIZE = int(os.getenv('REPOSITORY_CACHE_SIZE', 0))
+    REPOSITORY_CACHE_TTL = int(os.getenv('REPOSITORY_CACHE_TTL', 60))
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    BCRYPT_LOG_ROUNDS = 4
+
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
@@ -75,7 +75,7 @@ function initIndexPage() {
   fetchPlaces();
 }
 
-async function fetchPlaces() {
+async function fetchPlaces(maxPrice) {
   const container = document.getElementById('places-list');
   container.innerHTML = '<p>Loading places…</p>';
 
@@ -84,10 +84,9 @@ async function fetchPlaces() {
   if (token) headers['Authorization'] = `Bearer ${token}`;
 
   try {
-    const response = await fetch('http://127.0.0.1:5000/api/v1/places/', { headers });
-    if (response.status === 401) throw new Error('Unauthorized');
-    if (!response.ok) throw new Error(`Error ${response.status}`);
-    const places = await response.json();
+    const params = new URLSearchParams({ limit: '500' });
+    if (maxPrice) params.set('max_price', maxPrice);
+    const places = await fetchAllPages('http://127.0.0.1:5000/api/v1/places/', params, { headers });
     renderPlaces(places);
   } catch (err) {
     console.error('fetchPlaces error:', err);
@@ -95,6 +94,21 @@ async function fetchPlaces() {
   }
 }
 
+// Collections come one page at a time: follow the next cursor up to the last page
+async function fetchAllPages(url, params, options) {
+  const items = [];
+  let cursor = null;
+  do {
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${url}?${params}`, options);
+    if (response.status === 401) throw new Error('Unauthorized');
+    if (!response.ok) throw new Error(`Error ${response.status}`);
+    items.push(...await response.json());
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return items;
+}
+
 function renderPlaces(places) {
   const container = document.getElementById('places-list');
   container.innerHTML = '';
@@ -123,13 +137,8 @@ function setupPriceFilter() {
     opt.textContent = val;
     filter.appendChild(opt);
   });
-  filter.addEventListener('input', debounce(e => {
-    const max = e.target.value;
-    document.querySelectorAll('.place-card').forEach(card => {
-      const price = parseFloat(card.dataset.price);
-      card.style.display = (!max || price <= +max) ? '' : 'none';
-    });
-  }, 300));
+  // The server filters on the indexed price column
+  filter.addEventListener('input', debounce(e => fetchPlaces(e.target.value), 300));
 }
 
 /*** PLACE DETAIL PAGE ***/